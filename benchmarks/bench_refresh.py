@@ -0,0 +1,279 @@
+"""Benchmarks for the Monzo refresh paths against the fake Monzo API.
+
+Run from the repository root with Home Assistant installed::
+
+    python -m benchmarks.bench_refresh --accounts 5 --transactions 5000
+
+The fake API runs in a subprocess so the peak memory reported is that of
+the integration alone. Each scenario reports wall time, requests sent,
+transaction pages served per second and peak traced memory.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from aiohttp import ClientSession
+
+from custom_components.monzo.api.auth import AbstractAuth
+from custom_components.monzo.api.client import (
+    DEFAULT_REQUEST_BURST,
+    DEFAULT_REQUEST_RATE,
+    MonzoClient,
+)
+from custom_components.monzo.api.scheduler import RequestScheduler
+from custom_components.monzo.const import REFRESH_TIERS
+from custom_components.monzo.monzo_category_update_coordinator import (
+    MonzoCategoryUpdateCoordinator,
+)
+from custom_components.monzo.monzo_data import MonzoData
+from custom_components.monzo.transaction_store import MonzoTransactionStore, TransactionColumns
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .fake_monzo import config_arguments
+
+
+class StaticAuth(AbstractAuth):
+    """Auth returning a fixed token, the fake API accepts anything."""
+
+    async def async_get_access_token(self) -> str:
+        return "benchmark"
+
+
+@dataclass
+class Result:
+    name: str
+    wall_times: list[float]
+    requests: int
+    pages: int
+    peak_memory: int
+
+    def row(self) -> str:
+        wall = statistics.median(self.wall_times)
+        pages_per_second = self.pages / sum(self.wall_times) if self.pages else 0.0
+        return (
+            f"{self.name:<36} {wall * 1000:>10.1f} {self.requests:>9d} "
+            f"{pages_per_second:>9.1f} {self.peak_memory / 1024:>11.1f}"
+        )
+
+
+HEADER = f"{'scenario':<36} {'wall (ms)':>10} {'requests':>9} {'pages/s':>9} {'peak (KiB)':>11}"
+
+
+class FakeServer:
+    """Fake Monzo API running in a child process."""
+
+    def __init__(self, arguments: list[str]) -> None:
+        self._arguments = arguments
+        self._process: asyncio.subprocess.Process | None = None
+        self.url = ""
+
+    async def __aenter__(self) -> FakeServer:
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "benchmarks.fake_monzo", *self._arguments,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        self.url = (await self._process.stdout.readline()).decode().strip()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._process.terminate()
+        await self._process.wait()
+
+    async def stats(self, session: ClientSession) -> dict:
+        async with session.get(f"{self.url}/_stats") as response:
+            return json.loads(await response.read())
+
+    async def reset(self, session: ClientSession) -> None:
+        async with session.post(f"{self.url}/_reset"):
+            pass
+
+
+async def measure(
+    name: str,
+    server: FakeServer,
+    session: ClientSession,
+    repeat: int,
+    run: Callable[[], Awaitable[object]],
+    setup: Callable[[], Awaitable[object]] | None = None,
+) -> Result:
+    """Run a scenario ``repeat`` times and collect its figures."""
+    wall_times = []
+    requests = pages = peak = 0
+    for _ in range(repeat):
+        if setup is not None:
+            await setup()
+        await server.reset(session)
+        tracemalloc.start()
+        started = time.perf_counter()
+        await run()
+        wall_times.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        stats = await server.stats(session)
+        requests += stats["requests"]
+        pages += stats["pages"]
+    return Result(name, wall_times, requests // repeat, pages, peak)
+
+
+async def run_benchmarks(args: argparse.Namespace, server_arguments: list[str]) -> None:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        async with ClientSession() as session, FakeServer(server_arguments) as server:
+            auth = StaticAuth()
+            results = []
+
+            client_options = {
+                "request_rate": args.request_rate,
+                "request_burst": args.request_burst,
+            }
+
+            # Every client owns its connection pool, closed once all have run.
+            opened: list[MonzoClient | MonzoData] = []
+
+            def new_client() -> MonzoClient:
+                opened.append(MonzoClient(auth, server.url, **client_options))
+                return opened[-1]
+
+            def new_data() -> MonzoData:
+                opened.append(MonzoData(auth, host=server.url, **client_options))
+                return opened[-1]
+
+            accounts = await new_client().get_accounts()
+            since = dt_util.now() - timedelta(days=args.history_days)
+
+            async def get_accounts():
+                await new_client().get_accounts()
+
+            async def pull_transactions():
+                client = new_client()
+                for account in accounts:
+                    async for _transaction in client.async_get_transactions(account.id, since):
+                        pass
+
+            async def pull_transaction_summaries():
+                client = new_client()
+                for account in accounts:
+                    async for _transaction in client.async_get_transactions(account.id, since, summary=True):
+                        pass
+
+            async def stream_transaction_summaries():
+                client = new_client()
+                for account in accounts:
+                    async for _transaction in client.async_get_transactions(
+                        account.id, since, summary=True, stream=True
+                    ):
+                        pass
+
+            async def update_coordinated():
+                await new_data().async_update_coordinated(set(), set(REFRESH_TIERS))
+
+            results.append(await measure("client.get_accounts", server, session, args.repeat, get_accounts))
+            results.append(await measure("client.async_get_transactions (all)", server, session, args.repeat, pull_transactions))
+            results.append(await measure("client.async_get_transactions (summary)", server, session, args.repeat, pull_transaction_summaries))
+            results.append(await measure("client.async_get_transactions (stream)", server, session, args.repeat, stream_transaction_summaries))
+            results.append(await measure("MonzoData.async_update_coordinated", server, session, args.repeat, update_coordinated))
+
+            data = new_data()
+            store = MonzoTransactionStore(hass, "benchmark")
+            coordinator = MonzoCategoryUpdateCoordinator(
+                hass, data, store, [account.id for account in accounts]
+            )
+
+            async def reset_store():
+                store._columns = TransactionColumns()
+                store._cursors = {}
+                store._backfill = {}
+
+            async def cold_refresh():
+                await coordinator._async_update_data()
+                # Older history is backfilled after the refresh returns.
+                if coordinator._backfill_task is not None:
+                    await coordinator._backfill_task
+
+            results.append(
+                await measure(
+                    "category refresh (cold store)", server, session, args.repeat,
+                    cold_refresh, reset_store,
+                )
+            )
+            results.append(
+                await measure(
+                    "category refresh (warm store)", server, session, args.repeat,
+                    coordinator._async_update_data,
+                )
+            )
+
+            # The integration's own rate limits, which the refreshes above
+            # are given enough headroom to ignore.
+            default_data = MonzoData(auth, host=server.url)
+            opened.append(default_data)
+            default_store = MonzoTransactionStore(hass, "benchmark_defaults")
+            default_coordinator = MonzoCategoryUpdateCoordinator(
+                hass, default_data, default_store, [account.id for account in accounts]
+            )
+
+            async def reset_default_store():
+                default_store._columns = TransactionColumns()
+                default_store._cursors = {}
+                default_store._backfill = {}
+                default_data.invalidate_cache()
+                # Let the token bucket refill, as it would between restarts.
+                default_data._monzo_client.scheduler = RequestScheduler(
+                    DEFAULT_REQUEST_RATE, DEFAULT_REQUEST_BURST
+                )
+
+            async def first_refresh_with_defaults():
+                await asyncio.gather(
+                    default_data.async_update_coordinated(None, set(REFRESH_TIERS)),
+                    default_coordinator._async_update_data(),
+                )
+
+            results.append(
+                await measure(
+                    "first refresh (default rate limits)", server, session, args.repeat,
+                    first_refresh_with_defaults, reset_default_store,
+                )
+            )
+
+            for client in opened:
+                await client.async_close()
+
+            print(HEADER)
+            for result in results:
+                print(result.row())
+        await hass.async_stop(force=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    config_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--request-rate", type=float, default=1000.0)
+    parser.add_argument("--request-burst", type=int, default=1000)
+    args = parser.parse_args()
+    server_arguments = [
+        "--accounts", str(args.accounts),
+        "--pots", str(args.pots),
+        "--transactions", str(args.transactions),
+        "--history-days", str(args.history_days),
+        "--latency", str(args.latency),
+        "--error-rate", str(args.error_rate),
+        "--throttle-rate", str(args.throttle_rate),
+        "--seed", str(args.seed),
+    ]
+    asyncio.run(run_benchmarks(args, server_arguments))
+
+
+if __name__ == "__main__":
+    main()
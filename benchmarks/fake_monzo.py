@@ -0,0 +1,328 @@
+"""Local stand-in for the Monzo API used by the benchmarks.
+
+Serves synthetic accounts, balances, pots, paginated transactions and
+webhooks, with configurable latency and injected errors and throttling.
+
+Run standalone with ``python -m benchmarks.fake_monzo --port 8080``. The
+server prints the URL it listens on as its first line of output.
+``GET /_stats`` returns request counters and ``POST /_reset`` clears them.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+
+CATEGORIES = (
+    "eating_out",
+    "groceries",
+    "transport",
+    "shopping",
+    "bills",
+    "entertainment",
+    "category_0000AgJVm8aomFv6bdeQrp",
+    "category_0000AfMkAV0f1Efrz82aWX",
+)
+ACCOUNT_TYPES = ("uk_retail", "uk_retail_joint", "uk_monzo_flex", "uk_business", "uk_rewards")
+SCHEMES = ("mastercard", "payport_faster_payments", "bacs", "uk_retail_pot")
+
+
+@dataclass
+class FakeMonzoConfig:
+    """Shape of the synthetic user and behaviour of the server."""
+
+    accounts: int = 5
+    pots_per_account: int = 10
+    transactions_per_account: int = 2000
+    history_days: int = 60
+    latency: float = 0.02
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 0.1
+    seed: int = 0
+
+
+class FakeMonzoAPI:
+    """aiohttp application imitating the Monzo endpoints the client uses."""
+
+    def __init__(self, config: FakeMonzoConfig) -> None:
+        self.config = config
+        self._random = random.Random(config.seed)
+        self.requests: Counter[str] = Counter()
+        self.pages = 0
+        self.errors = 0
+        self.throttled = 0
+        self._webhook_ids = 0
+        self._build_data()
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.add_routes(
+            [
+                web.get("/accounts", self._accounts),
+                web.get("/balance", self._balance),
+                web.get("/pots", self._pots),
+                web.put("/pots/{pot_id}/deposit", self._deposit),
+                web.put("/pots/{pot_id}/withdraw", self._withdraw),
+                web.get("/transactions", self._transactions),
+                web.get("/webhooks", self._webhooks),
+                web.post("/webhooks", self._register_webhook),
+                web.delete("/webhooks/{webhook_id}", self._unregister_webhook),
+                web.get("/_stats", self._stats),
+                web.post("/_reset", self._reset),
+            ]
+        )
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    def _build_data(self) -> None:
+        config = self.config
+        now = datetime.now(timezone.utc)
+        start = now - timedelta(days=config.history_days)
+        self.accounts = []
+        self.balances = {}
+        self.pots = {}
+        self.transactions = {}
+        self.webhooks = {}
+        for index in range(config.accounts):
+            account_id = f"acc_{index:04d}"
+            self.accounts.append(
+                {
+                    "id": account_id,
+                    "account_number": f"{10000000 + index}",
+                    "sort_code": "040004",
+                    "type": ACCOUNT_TYPES[index % len(ACCOUNT_TYPES)],
+                    "closed": False,
+                }
+            )
+            self.pots[account_id] = [
+                {
+                    "id": f"pot_{index:04d}_{pot:04d}",
+                    "current_account_id": account_id,
+                    "name": f"Pot {pot}",
+                    "balance": self._random.randint(0, 500000),
+                    "currency": "GBP",
+                    "goal_amount": 100000,
+                    "deleted": False,
+                    "locked": False,
+                    "type": "flexible_savings",
+                    "cover_image_url": "https://example.invalid/pot.png",
+                }
+                for pot in range(config.pots_per_account)
+            ]
+            self.balances[account_id] = {
+                "balance": self._random.randint(0, 1000000),
+                "currency": "GBP",
+                "spend_today": -self._random.randint(0, 10000),
+                "total_balance": self._random.randint(1000000, 2000000),
+            }
+            step = (now - start) / max(config.transactions_per_account, 1)
+            transactions = []
+            for tx in range(config.transactions_per_account):
+                amount = -self._random.randint(100, 10000)
+                category = self._random.choice(CATEGORIES)
+                transactions.append(
+                    {
+                        "id": f"tx_{index:04d}_{tx:08d}",
+                        "account_id": account_id,
+                        "amount": amount,
+                        "currency": "GBP",
+                        "created": (start + step * tx).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                        "description": f"Merchant {tx % 97}",
+                        "scheme": self._random.choice(SCHEMES),
+                        "decline_reason": "INSUFFICIENT_FUNDS" if self._random.random() < 0.02 else None,
+                        "category": category,
+                        "categories": {category: amount},
+                        "metadata": {"notes": ""},
+                        "counterparty": {},
+                    }
+                )
+            self.transactions[account_id] = transactions
+            self.webhooks[account_id] = []
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.path.startswith("/_"):
+            return await handler(request)
+        self.requests[request.path.split("/")[1]] += 1
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+        if self._random.random() < self.config.throttle_rate:
+            self.throttled += 1
+            return web.json_response(
+                {"code": "too_many_requests", "message": "Rate limited"},
+                status=429,
+                headers={"Retry-After": str(self.config.retry_after)},
+            )
+        if self._random.random() < self.config.error_rate:
+            self.errors += 1
+            return web.json_response(
+                {"code": "internal_service.error", "message": "Injected error"},
+                status=500,
+            )
+        return await handler(request)
+
+    async def _accounts(self, request: web.Request) -> web.Response:
+        return web.json_response({"accounts": self.accounts})
+
+    async def _balance(self, request: web.Request) -> web.Response:
+        balance = self.balances.get(request.query.get("account_id"))
+        if balance is None:
+            return _not_found()
+        return web.json_response(balance)
+
+    async def _pots(self, request: web.Request) -> web.Response:
+        pots = self.pots.get(request.query.get("current_account_id"))
+        if pots is None:
+            return _not_found()
+        return web.json_response({"pots": pots})
+
+    async def _move(self, request: web.Request, sign: int) -> web.Response:
+        data = await request.post()
+        for pots in self.pots.values():
+            for pot in pots:
+                if pot["id"] == request.match_info["pot_id"]:
+                    pot["balance"] += sign * int(data["amount"])
+                    return web.json_response(pot)
+        return _not_found()
+
+    async def _deposit(self, request: web.Request) -> web.Response:
+        return await self._move(request, 1)
+
+    async def _withdraw(self, request: web.Request) -> web.Response:
+        return await self._move(request, -1)
+
+    async def _transactions(self, request: web.Request) -> web.Response:
+        transactions = self.transactions.get(request.query.get("account_id"))
+        if transactions is None:
+            return _not_found()
+        since = request.query.get("since", "")
+        limit = int(request.query.get("limit", "100"))
+        if since.startswith("tx_"):
+            ids = [transaction["id"] for transaction in transactions]
+            start = bisect.bisect_right(ids, since)
+        else:
+            created = [transaction["created"] for transaction in transactions]
+            start = bisect.bisect_left(created, since.replace("Z", ".000000Z"))
+        self.pages += 1
+        return web.json_response({"transactions": transactions[start:start + limit]})
+
+    async def _webhooks(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"webhooks": self.webhooks.get(request.query.get("account_id"), [])}
+        )
+
+    async def _register_webhook(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        self._webhook_ids += 1
+        webhook = {
+            "id": f"webhook_{self._webhook_ids:04d}",
+            "account_id": data["account_id"],
+            "url": data["url"],
+        }
+        self.webhooks.setdefault(data["account_id"], []).append(webhook)
+        return web.json_response({"webhook": webhook})
+
+    async def _unregister_webhook(self, request: web.Request) -> web.Response:
+        for webhooks in self.webhooks.values():
+            webhooks[:] = [w for w in webhooks if w["id"] != request.match_info["webhook_id"]]
+        return web.json_response({})
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def _reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({})
+
+    def stats(self) -> dict:
+        """Return the request counters."""
+        return {
+            "requests": sum(self.requests.values()),
+            "by_endpoint": dict(self.requests),
+            "pages": self.pages,
+            "errors": self.errors,
+            "throttled": self.throttled,
+        }
+
+    def reset(self) -> None:
+        """Clear the request counters."""
+        self.requests.clear()
+        self.pages = 0
+        self.errors = 0
+        self.throttled = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def _not_found() -> web.Response:
+    return web.json_response({"code": "not_found", "message": "Not found"}, status=404)
+
+
+def config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the FakeMonzoConfig options to an argument parser."""
+    defaults = FakeMonzoConfig()
+    parser.add_argument("--accounts", type=int, default=defaults.accounts)
+    parser.add_argument("--pots", type=int, default=defaults.pots_per_account)
+    parser.add_argument("--transactions", type=int, default=defaults.transactions_per_account)
+    parser.add_argument("--history-days", type=int, default=defaults.history_days)
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_arguments(args: argparse.Namespace) -> FakeMonzoConfig:
+    """Build a FakeMonzoConfig from parsed arguments."""
+    return FakeMonzoConfig(
+        accounts=args.accounts,
+        pots_per_account=args.pots,
+        transactions_per_account=args.transactions,
+        history_days=args.history_days,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+
+
+async def _serve(config: FakeMonzoConfig, port: int) -> None:
+    api = FakeMonzoAPI(config)
+    print(await api.start(port=port), flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=0)
+    config_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(config_from_arguments(args), args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,20 @@
 from __future__ import annotations
 
 from aiohttp import web
+import asyncio
+from functools import partial
 import secrets
 import logging
 
+from pydantic import ValidationError
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform, CONF_WEBHOOK_ID
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import aiohttp_client, config_entry_oauth2_flow
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, Platform, CONF_WEBHOOK_ID
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.helpers import config_entry_oauth2_flow
 from homeassistant.components import webhook
 from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util.ssl import get_default_context
 
 from .api.models.transaction import TransactionWrapper
 
@@ -20,25 +25,45 @@ from .monzo_data import MonzoData
 from .monzo_update_coordinator import MonzoUpdateCoordinator
 from .monzo_category_update_coordinator import MonzoCategoryUpdateCoordinator
 from .services import setup_services
+from .snapshot import MonzoSnapshotStore
+from .statistics import MonzoStatisticsImporter
+from .transaction_store import MonzoTransactionStore
+from .webhook_dedupe import WebhookDeduplicator
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.EVENT]
 
 _LOGGER = logging.getLogger(__name__)
 
-async def handle_webhook(hass, webhook_id, request):
-    """Handle incoming webhook with Monzo Client request."""
-    data = await request.json()
-    transaction_wrapper = TransactionWrapper(**data)
-    account_id = transaction_wrapper.data.account_id
+async def handle_webhook(deduplicator: WebhookDeduplicator, hass, webhook_id, request):
+    """Handle incoming webhook with Monzo Client request.
+
+    The request is acknowledged straight away and processed in the background.
+    """
+    body = await request.read()
+    hass.async_create_background_task(
+        _async_process_webhook(hass, deduplicator, body), "monzo_webhook"
+    )
+    return web.Response(text="Logged")
+
+async def _async_process_webhook(hass, deduplicator: WebhookDeduplicator, body: bytes):
+    try:
+        transaction_wrapper = TransactionWrapper.model_validate_json(body)
+    except ValidationError as err:
+        _LOGGER.warning("Ignoring invalid Monzo webhook: %s", err)
+        return
+    transaction = transaction_wrapper.data
+    if deduplicator.is_duplicate(transaction_wrapper.type, transaction.id, body):
+        _LOGGER.debug("Dropping duplicate Monzo webhook: %s %s", transaction_wrapper.type, transaction.id)
+        return
+    account_id = transaction.account_id
 
     async_dispatcher_send(
         hass,
         f"{WEBHOOK_UPDATE}-{account_id}",
         transaction_wrapper.type,
-        transaction_wrapper.data,
+        transaction,
     )
     _LOGGER.info("Received Monzo webhook: %s", account_id)
-    return web.Response(text="Logged")
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Monzo from a config entry."""
@@ -50,24 +75,65 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     session = config_entry_oauth2_flow.OAuth2Session(hass, entry, implementation)
 
-    # If using an aiohttp-based API lib
-    auth = AsyncConfigEntryAuth(
-        aiohttp_client.async_get_clientsession(hass), session
-    )
+    auth = AsyncConfigEntryAuth(session)
+
+    entry.async_on_unload(auth.async_shutdown)
+
+    # The client has its own connection pool rather than HA's shared one.
+    client = MonzoData(auth, ssl_context=get_default_context())
 
-    client = MonzoData(auth)
+    # Unloading closes the pool, but entries aren't unloaded when HA stops.
+    async def async_close_client(_event: Event) -> None:
+        await client.async_close()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_close_client)
+    )
 
     coordinator = MonzoUpdateCoordinator(hass, client)
 
-    await coordinator.async_config_entry_first_refresh()
+    transaction_store = MonzoTransactionStore(hass, entry.entry_id)
+    await transaction_store.async_load()
 
-    account_ids = [idx for idx, ent in coordinator.data.items() if idx.startswith("acc")]
-    
-    category_coordinator = MonzoCategoryUpdateCoordinator(hass, client, account_ids)
+    category_coordinator = MonzoCategoryUpdateCoordinator(hass, client, transaction_store)
+
+    snapshot_store = MonzoSnapshotStore(hass, entry.entry_id)
+    snapshot = await snapshot_store.async_load()
+    restored = False
+    if snapshot is not None:
+        try:
+            snapshot_store.async_restore(snapshot, client, coordinator, category_coordinator)
+            restored = True
+        except (KeyError, ValidationError) as err:
+            _LOGGER.warning("Discarding unreadable Monzo snapshot: %s", err)
+
+    if restored:
+        # Entities start from the last good data, fresh data follows shortly.
+        async def async_refresh_restored() -> None:
+            await asyncio.gather(coordinator.async_refresh(), category_coordinator.async_refresh())
 
-    await category_coordinator.async_config_entry_first_refresh()
+        refresh_task = hass.async_create_background_task(
+            async_refresh_restored(), "monzo_snapshot_refresh"
+        )
+        entry.async_on_unload(refresh_task.cancel)
+    else:
+        # The coordinators share the accounts listing, so neither waits on the other.
+        results = await asyncio.gather(
+            coordinator.async_config_entry_first_refresh(),
+            category_coordinator.async_config_entry_first_refresh(),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                await client.async_close()
+                raise result
+    entry.async_on_unload(category_coordinator.async_setup_webhook_listeners())
+    entry.async_on_unload(snapshot_store.async_track(client, coordinator, category_coordinator))
+
+    account_ids = [idx for idx, ent in coordinator.data.items() if idx.startswith("acc")]
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+        "client": client,
         "coordinator": coordinator,
         "category_coordinator": category_coordinator
     }
@@ -78,14 +144,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     webhook_url = webhook.async_generate_url(hass, entry.data[CONF_WEBHOOK_ID])
     webhook.async_register(
-        hass, DOMAIN, "Monzo", entry.data[CONF_WEBHOOK_ID], handle_webhook
+        hass, DOMAIN, "Monzo", entry.data[CONF_WEBHOOK_ID], partial(handle_webhook, WebhookDeduplicator())
     )
-    
-    for idx in account_ids:
-        await coordinator.register_webhook(idx, webhook_url)
-        _LOGGER.info("Registered Monzo account webhook: %s : %s", idx, webhook_url)
     _LOGGER.info("Registered HASS Monzo webhook: %s", webhook_url)
 
+    # Registering with Monzo doesn't block startup, transactions are picked
+    # up by polling until it completes.
+    reconcile_task = hass.async_create_background_task(
+        coordinator.async_reconcile_webhooks(account_ids, webhook_url), "monzo_webhook_reconcile"
+    )
+    entry.async_on_unload(reconcile_task.cancel)
+
+    if "recorder" in hass.config.components:
+        importer = MonzoStatisticsImporter(hass, client, entry.entry_id)
+        account_names = {idx: ent.name for idx, ent in coordinator.data.items() if idx.startswith("acc")}
+        statistics_task = hass.async_create_background_task(
+            importer.async_run(account_names), "monzo_statistics_import"
+        )
+        entry.async_on_unload(statistics_task.cancel)
+        entry.async_on_unload(importer.async_shutdown)
+
     setup_services(hass, entry)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -103,5 +181,6 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         for idx, ent in coordinator.data.items():
             if idx.startswith("webhook"):
                 await coordinator.unregister_webhook(idx)
+        await config["client"].async_close()
 
     return unload_ok
\ No newline at end of file
@@ -1,12 +1,12 @@
-from aiohttp import ClientSession
 from abc import abstractmethod
 
 
 class AbstractAuth:
-    def __init__(self, websession: ClientSession):
-        """Initialize the auth."""
-        self._websession = websession
+    """Access tokens for the Monzo client, which makes requests itself."""
 
     @abstractmethod
     async def async_get_access_token(self) -> str:
-        """Return a valid access token."""
\ No newline at end of file
+        """Return a valid access token."""
+
+    async def async_refresh_access_token(self) -> None:
+        """Refresh the access token after the API rejected it as expired."""
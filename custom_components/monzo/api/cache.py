@@ -0,0 +1,64 @@
+import asyncio
+from time import monotonic
+from typing import Any, Awaitable, Callable
+
+
+class ResponseCache:
+    """TTL cache for API responses that also collapses concurrent fetches.
+
+    Callers asking for a key that is already being fetched wait on the same
+    in-flight request instead of issuing their own.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+
+    async def async_fetch(
+        self,
+        key: str,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda _: True,
+    ) -> Any:
+        """Return the cached value for ``key`` or fetch it."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > monotonic():
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda done: self._store(key, ttl, done, cacheable)
+            )
+        else:
+            self.collapsed += 1
+        # Shield so one caller being cancelled doesn't cancel the others.
+        return await asyncio.shield(task)
+
+    def invalidate(self, prefix: str = "") -> None:
+        """Drop cached and in-flight entries whose key starts with ``prefix``."""
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+        for key in [key for key in self._inflight if key.startswith(prefix)]:
+            del self._inflight[key]
+
+    def _store(self, key: str, ttl: float, task: asyncio.Future, cacheable) -> None:
+        if self._inflight.get(key) is not task:
+            # Invalidated while in flight, the result may already be stale.
+            return
+        del self._inflight[key]
+        if ttl <= 0 or task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if cacheable(result):
+            self._entries[key] = (monotonic() + ttl, result)
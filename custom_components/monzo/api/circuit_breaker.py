@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from enum import Enum
+from time import monotonic
+
+
+class CircuitState(str, Enum):
+    """States of the circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreakerStats:
+    """Counters describing how often the breaker tripped."""
+
+    failures: int = 0
+    consecutive_failures: int = 0
+    trips: int = 0
+    rejected: int = 0
+
+
+class CircuitOpenError(Exception):
+    """Error thrown when a request is refused because the circuit is open."""
+
+    def __init__(self, *args: object) -> None:
+        """Initialise error."""
+        super().__init__(*args)
+
+
+class CircuitBreaker:
+    """Stops requests to the API while it keeps failing.
+
+    After ``failure_threshold`` consecutive transient failures the circuit
+    opens and requests fail straight away. Once ``reset_timeout`` has passed
+    a single trial request is let through: success closes the circuit, while
+    failure opens it again with the timeout doubled, up to ``max_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, max_timeout: float = 600.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._max_timeout = max_timeout
+        self._timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.stats = CircuitBreakerStats()
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and monotonic() - self._opened_at >= self._timeout:
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until a trial request will be allowed."""
+        if self._state != CircuitState.OPEN:
+            return 0.0
+        return max(self._opened_at + self._timeout - monotonic(), 0.0)
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError if a request may not be sent now."""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return
+        if state == CircuitState.HALF_OPEN and not self._trial_running:
+            self._state = CircuitState.HALF_OPEN
+            self._trial_running = True
+            return
+        self.stats.rejected += 1
+        raise CircuitOpenError(f"Monzo API circuit open, retrying in {self.retry_in:.0f}s")
+
+    def record_success(self) -> None:
+        self._state = CircuitState.CLOSED
+        self._trial_running = False
+        self._timeout = self._reset_timeout
+        self.stats.consecutive_failures = 0
+
+    def abandon(self) -> None:
+        """Release a trial request that ended without a result."""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.stats.failures += 1
+        self.stats.consecutive_failures += 1
+        if self._state == CircuitState.HALF_OPEN:
+            self._timeout = min(self._timeout * 2, self._max_timeout)
+            self._open()
+        elif self._state == CircuitState.CLOSED and self.stats.consecutive_failures >= self._failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = monotonic()
+        self._trial_running = False
+        self.stats.trips += 1
@@ -1,98 +1,353 @@
+import asyncio
+import random
 import secrets
 import logging
+import ssl
 
-from datetime import date
-from typing import Any, AsyncIterator
+from contextlib import aclosing
+from datetime import date, datetime, timezone
+from http import HTTPStatus
+from time import monotonic, perf_counter
+from typing import AsyncIterator, TypeVar
 
-from aiohttp import ClientResponse
+from aiohttp import ClientError, ClientResponse, ClientResponseError, ClientSession
+from pydantic import BaseModel, ValidationError
 from .models.account import Account
 from .models.balance import Balance
 from .models.pot import Pot
-from .models.transaction import Transaction
-from .models.webhook import Webhook
+from .models.responses import (
+    AccountsResponse,
+    ErrorResponse,
+    PotsResponse,
+    TransactionSummariesResponse,
+    TransactionsResponse,
+    WebhookResponse,
+    WebhooksResponse,
+)
+from .models.transaction import Transaction, TransactionSummary
 from .auth import AbstractAuth
+from .cache import ResponseCache
+from .circuit_breaker import CircuitBreaker
+from .metrics import ApiMetrics
+from .scheduler import RequestPriority, RequestScheduler
+from .session import DEFAULT_LIMIT_PER_HOST, ConnectionStats, create_session
+from .streaming import JsonArraySplitter
 
 _LOGGER = logging.getLogger(__name__)
 
 TOKEN_EXPIRY_CODE = "unauthorized.bad_access_token.expired"
 TOKEN_INSUFFICIENT_PERMISSIONS = "forbidden.insufficient_permissions"
-CODE = "code"
 
-PAGINATION_LIMIT = 30
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+MAX_PAGE_SIZE = 100
+DEFAULT_PAGE_SIZE = MAX_PAGE_SIZE
+
+DEFAULT_REQUEST_RATE = 5.0
+DEFAULT_REQUEST_BURST = 30
+MAX_THROTTLE_RETRIES = 3
+DEFAULT_RETRY_AFTER = 5.0
+# Server errors and connection failures are retried after a jittered,
+# exponentially growing delay.
+MAX_TRANSIENT_RETRIES = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 4.0
+
+ACCOUNTS_CACHE_TTL = 3600
+WEBHOOKS_CACHE_TTL = 3600
+
+# Bytes read at a time from a streamed response.
+STREAM_CHUNK_SIZE = 16 * 1024
 
 class MonzoClient:
-    def __init__(self, auth: AbstractAuth, host: str):
+    def __init__(
+        self,
+        auth: AbstractAuth,
+        host: str,
+        request_rate: float = DEFAULT_REQUEST_RATE,
+        request_burst: int = DEFAULT_REQUEST_BURST,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        ssl_context: ssl.SSLContext | None = None,
+        limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+    ):
         self._auth = auth
         self._host = host
-    
-    async def make_request(self, method, url, **kwargs) -> ClientResponse:
-        """Make a request."""
-        headers = kwargs.get("headers")
+        self._page_size = min(page_size, MAX_PAGE_SIZE)
+        self._ssl_context = ssl_context
+        self._limit_per_host = limit_per_host
+        self._session: ClientSession | None = None
+        self.scheduler = RequestScheduler(request_rate, request_burst)
+        self.cache = ResponseCache()
+        self.metrics = ApiMetrics()
+        self.breaker = CircuitBreaker()
+        self.connection_stats = ConnectionStats()
+
+    @property
+    def session(self) -> ClientSession:
+        """Return the client's own session, created on first use."""
+        if self._session is None or self._session.closed:
+            self._session = create_session(self.connection_stats, self._ssl_context, self._limit_per_host)
+        return self._session
+
+    async def async_close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def invalidate_cache(self, prefix: str = "") -> None:
+        self.cache.invalidate(prefix)
+
+    async def make_request(self, method, url, priority: RequestPriority = RequestPriority.POLL, cache_ttl: float = 0, **kwargs) -> bytes:
+        """Make a request and return the raw response body.
+
+        Concurrent identical GETs share a single request, and successful GET
+        responses are cached for ``cache_ttl`` seconds. Error responses raise.
+        """
+        if method == "GET":
+            return await self.cache.async_fetch(
+                url,
+                cache_ttl,
+                lambda: self._request(method, url, priority, **kwargs),
+            )
+        return await self._request(method, url, priority, **kwargs)
+
+    async def _request(self, method, url, priority: RequestPriority, stream: bool = False, **kwargs) -> bytes | ClientResponse:
+        """Send a request, pacing it through the scheduler.
+
+        Throttled requests wait for the API's Retry-After. Server errors and
+        connection failures are retried with backoff, except for POSTs which
+        aren't safe to repeat. An expired access token is refreshed once.
+        Every attempt has to pass the circuit breaker.
+
+        With ``stream`` a successful response is returned unread, for the
+        caller to read and release.
+        """
+        headers = kwargs.pop("headers", None)
 
         if headers is None:
             headers = {}
         else:
             headers = dict(headers)
 
-        access_token = await self._auth.async_get_access_token()
-        headers["authorization"] = f"Bearer {access_token}"
+        endpoint = self.metrics.endpoints[_endpoint_name(method, url)]
+        retry_transient = method != "POST"
+        throttled = retries = 0
+        token_refreshed = False
+        while True:
+            self.breaker.before_request()
+            try:
+                response, body = await self._send(method, url, priority, headers, endpoint, stream, **kwargs)
+            except (ClientError, asyncio.TimeoutError):
+                self.breaker.record_failure()
+                if not retry_transient or retries == MAX_TRANSIENT_RETRIES:
+                    raise
+                retries += 1
+                await self._async_retry_delay(url, retries)
+                continue
+            except BaseException:
+                self.breaker.abandon()
+                raise
 
-        response = await self._auth._websession.request(
-            method, f"{self._host}/{url}", **kwargs, headers=headers,
-        )
-        return await response.json()
+            if response.status < HTTPStatus.BAD_REQUEST:
+                self.breaker.record_success()
+                return response if stream else body
+            error = _parse_error(body)
+            endpoint.record_error(error.code)
+            if response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                self.breaker.record_failure()
+                if retry_transient and retries < MAX_TRANSIENT_RETRIES:
+                    retries += 1
+                    await self._async_retry_delay(url, retries)
+                    continue
+                raise _response_error(url, response.status, error, body)
+
+            # The API answered, so it is up even though it refused the request.
+            self.breaker.record_success()
+            if _authorisation_expired(error) and not token_refreshed:
+                token_refreshed = True
+                await self._async_refresh_access_token()
+                continue
+            if response.status != HTTPStatus.TOO_MANY_REQUESTS or throttled == MAX_THROTTLE_RETRIES:
+                raise _response_error(url, response.status, error, body)
+
+            delay = _retry_after(response, throttled)
+            throttled += 1
+            _LOGGER.warning("Monzo API rate limit hit, backing off for %.1fs", delay)
+            self.scheduler.backoff(delay)
+
+    async def _send(self, method, url, priority: RequestPriority, headers, endpoint, stream: bool = False, **kwargs) -> tuple[ClientResponse, bytes | None]:
+        """Send a single attempt of a request once the scheduler allows it.
+
+        Successful streamed responses are returned without a body, and are
+        recorded in the metrics once they have been read.
+        """
+        await self.scheduler.acquire(priority)
+
+        try:
+            access_token = await self._auth.async_get_access_token()
+        except ClientResponseError as err:
+            if err.status in (HTTPStatus.BAD_REQUEST, HTTPStatus.UNAUTHORIZED):
+                raise AuthorisationExpiredError(str(err)) from err
+            raise
+        headers["authorization"] = f"Bearer {access_token}"
 
-    async def get_accounts(self) -> list[Account]:
-        data = await self.make_request("GET", "accounts")
+        started = monotonic()
         try:
-            accounts = [Account(**a) for a in data['accounts'] if 'account_number' in a]
-        except KeyError:
-            _LOGGER.error("Failed to get accounts from Monzo API: %s", str(data))
-            _raise_auth_or_response_error(data)
-        return accounts
-
-    async def get_balance(self, account_id: str) -> Balance:
-        data = await self.make_request("GET", f"balance?account_id={account_id}")
+            response = await self.session.request(
+                method, f"{self._host}/{url}", **kwargs, headers=headers,
+            )
+            if stream and response.status < HTTPStatus.BAD_REQUEST:
+                return response, None
+            body = await response.read()
+        except (ClientError, asyncio.TimeoutError):
+            endpoint.record_error("connection_error")
+            raise
+        endpoint.record_response(monotonic() - started, len(body))
+        return response, body
+
+    async def _async_refresh_access_token(self) -> None:
         try:
-            balance =  Balance(**data)
-        except KeyError:
-            _LOGGER.error("Failed to get balance from Monzo API: %s", str(data))
-            _raise_auth_or_response_error(data)
-        return balance
-
-    async def get_pots(self, account_id: str):
-        data = await self.make_request("GET", f"pots?current_account_id={account_id}")
+            await self._auth.async_refresh_access_token()
+        except ClientResponseError as err:
+            if err.status in (HTTPStatus.BAD_REQUEST, HTTPStatus.UNAUTHORIZED):
+                raise AuthorisationExpiredError(str(err)) from err
+            raise
+
+    async def _async_retry_delay(self, url: str, attempt: int) -> None:
+        delay = _backoff_delay(attempt)
+        _LOGGER.debug("Retrying Monzo API request %s in %.2fs (attempt %s)", url, delay, attempt)
+        await asyncio.sleep(delay)
+
+    def _decode(self, model: type[ModelT], body: bytes) -> ModelT:
+        """Validate a response body straight into its model."""
+        started = perf_counter()
         try:
-            pots = [Pot(**pot) for pot in data['pots'] if not pot['deleted']]
-        except KeyError:
-            _LOGGER.error("Failed to get pots from Monzo API: %s", str(data))
-            _raise_auth_or_response_error(data)
-        return pots
-
-    async def async_get_transactions(self, account_id: str, start_date: date) -> AsyncIterator[Transaction]:
-        start_date_str = start_date.strftime("%Y-%m-%dT00:00:00Z")
-        data = await self.make_request("GET", f"/transactions?account_id={account_id}&since={start_date_str}&limit={PAGINATION_LIMIT}")
+            return model.model_validate_json(body)
+        except ValidationError as err:
+            _LOGGER.error("Unexpected response from Monzo API: %s", body)
+            raise InvalidMonzoAPIResponseError(str(err)) from err
+        finally:
+            self.metrics.decode_time[model.__name__] += perf_counter() - started
+
+    async def get_accounts(self, priority: RequestPriority = RequestPriority.POLL) -> list[Account]:
+        body = await self.make_request("GET", "accounts", priority, ACCOUNTS_CACHE_TTL)
+        accounts = self._decode(AccountsResponse, body).accounts
+        return [account for account in accounts if account.account_number is not None]
+
+    async def get_balance(self, account_id: str, priority: RequestPriority = RequestPriority.POLL) -> Balance:
+        body = await self.make_request("GET", f"balance?account_id={account_id}", priority)
+        return self._decode(Balance, body)
+
+    async def get_pots(self, account_id: str, priority: RequestPriority = RequestPriority.POLL):
+        body = await self.make_request("GET", f"pots?current_account_id={account_id}", priority)
+        return [pot for pot in self._decode(PotsResponse, body).pots if not pot.deleted]
+
+    async def async_get_transactions(
+        self,
+        account_id: str,
+        start_date: date | datetime,
+        page_size: int | None = None,
+        priority: RequestPriority = RequestPriority.POLL,
+        summary: bool = False,
+        stream: bool = False,
+    ) -> AsyncIterator[Transaction | TransactionSummary]:
+        """Yield transactions since ``start_date``, oldest first.
+
+        The next page is requested while the current one is being consumed,
+        so at most one page is buffered ahead of the caller. With ``summary``
+        only the fields needed for aggregation are decoded.
+
+        With ``stream`` each page is decoded as it downloads and nothing is
+        read ahead, so memory stays flat whatever the page size. A page that
+        fails part way raises after its earlier transactions were yielded.
+        """
+        limit = min(page_size or self._page_size, MAX_PAGE_SIZE)
+        if stream:
+            model = TransactionSummary if summary else Transaction
+            since = _format_since(start_date)
+            while since is not None:
+                count = 0
+                # Release the page's response as soon as the caller stops.
+                page = self._stream_transactions_page(account_id, since, limit, priority, model)
+                async with aclosing(page):
+                    async for transaction in page:
+                        count += 1
+                        yield transaction
+                since = transaction.id if count == limit else None
+            return
+        response = TransactionSummariesResponse if summary else TransactionsResponse
+        next_page = asyncio.ensure_future(
+            self._get_transactions_page(account_id, _format_since(start_date), limit, priority, response)
+        )
         try:
-            while 'transactions' in data:
-                for transaction in data['transactions']:
-                    id = transaction['id']
-                    yield Transaction(**transaction)
-                if len(data['transactions']) == PAGINATION_LIMIT:
-                    data = await self.make_request("GET", f"/transactions?account_id={account_id}&since={id}&limit={PAGINATION_LIMIT}")
-                else:
-                    break
-        except KeyError:
-            _LOGGER.error("Failed to get transactions from Monzo API: %s", str(data))
-            _raise_auth_or_response_error(data)
-
-    async def get_webhooks(self, account_id: str):
-        data = await self.make_request("GET", f"webhooks?account_id={account_id}")
+            while next_page is not None:
+                transactions = await next_page
+                next_page = None
+                if len(transactions) == limit:
+                    next_page = asyncio.ensure_future(
+                        self._get_transactions_page(account_id, transactions[-1].id, limit, priority, response)
+                    )
+                for transaction in transactions:
+                    yield transaction
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def _get_transactions_page(
+        self,
+        account_id: str,
+        since: str,
+        limit: int,
+        priority: RequestPriority,
+        response: type[TransactionsResponse | TransactionSummariesResponse],
+    ) -> list[Transaction | TransactionSummary]:
+        self.metrics.pages += 1
+        body = await self.make_request("GET", _transactions_url(account_id, since, limit), priority)
+        return self._decode(response, body).transactions
+
+    async def _stream_transactions_page(
+        self,
+        account_id: str,
+        since: str,
+        limit: int,
+        priority: RequestPriority,
+        model: type[Transaction | TransactionSummary],
+    ) -> AsyncIterator[Transaction | TransactionSummary]:
+        """Yield the transactions of a page as its body arrives.
+
+        A page the caller stops early is recorded in the metrics as far as it
+        was read. A connection failure part way through the body is recorded
+        as a transient failure, as it is for any other request.
+        """
+        self.metrics.pages += 1
+        url = _transactions_url(account_id, since, limit)
+        endpoint = self.metrics.endpoints[_endpoint_name("GET", url)]
+        started = monotonic()
+        response = await self._request("GET", url, priority, stream=True)
+        splitter = JsonArraySplitter("transactions")
+        size = 0
+        failed = False
         try:
-            webhooks = [Webhook(**hook) for hook in data['webhooks']]
-        except KeyError:
-            _LOGGER.error("Failed to get webhooks from Monzo API: %s", str(data))
-            _raise_auth_or_response_error(data)
-        return webhooks
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                size += len(chunk)
+                for element in splitter.feed(chunk):
+                    yield self._decode(model, element)
+            splitter.close()
+        except ValueError as err:
+            raise InvalidMonzoAPIResponseError(str(err)) from err
+        except (ClientError, asyncio.TimeoutError):
+            failed = True
+            endpoint.record_error("connection_error")
+            self.breaker.record_failure()
+            raise
+        finally:
+            response.release()
+            if not failed:
+                endpoint.record_response(monotonic() - started, size)
+
+    async def get_webhooks(self, account_id: str, priority: RequestPriority = RequestPriority.POLL):
+        body = await self.make_request("GET", f"webhooks?account_id={account_id}", priority, WEBHOOKS_CACHE_TTL)
+        return self._decode(WebhooksResponse, body).webhooks
 
     async def register_webhook(self, account_id: str, url: str):
         existing = await self.get_webhooks(account_id)
@@ -102,42 +357,79 @@ class MonzoClient:
             return found_hooks[0]
         _LOGGER.debug("Registering Monzo account webhook: %s : %s", account_id, url)
         post_data = { 'account_id': account_id, 'url': url}
-        data = await self.make_request("POST", "webhooks", data=post_data)
-        _LOGGER.debug("Registered Monzo account webhook using data: %s", str(data))
-        return Webhook(**data['webhook'])
+        body = await self.make_request("POST", "webhooks", data=post_data)
+        self.invalidate_cache(f"webhooks?account_id={account_id}")
+        _LOGGER.debug("Registered Monzo account webhook using data: %s", body)
+        return self._decode(WebhookResponse, body).webhook
 
     async def unregister_webhook(self, webhook_id: str):
         _LOGGER.debug("Unregistering Monzo account webhook: %s", webhook_id)
-        data = await self.make_request("DELETE", f"webhooks/{webhook_id}")
-        _LOGGER.debug("Unregistered Monzo account webhook using data: %s", str(data))
-        return data
+        body = await self.make_request("DELETE", f"webhooks/{webhook_id}")
+        self.invalidate_cache("webhooks")
+        _LOGGER.debug("Unregistered Monzo account webhook using data: %s", body)
 
-    async def deposit_pot(self, pot: Pot, amount: int):
+    async def deposit_pot(self, pot: Pot, amount: int, dedupe_id: str | None = None):
         _LOGGER.debug("Depositing into pot: %s", pot.id)
-        post_data = { 'source_account_id': pot.account_id, 'amount': amount, 'dedupe_id': secrets.token_hex()}
-        data = await self.make_request("PUT", f"pots/{pot.id}/deposit", data=post_data)
-        _LOGGER.debug("Deposit success: %s", str(data))
-        return Pot(**data)
+        post_data = { 'source_account_id': pot.account_id, 'amount': amount, 'dedupe_id': dedupe_id or secrets.token_hex()}
+        body = await self.make_request("PUT", f"pots/{pot.id}/deposit", RequestPriority.WRITE, data=post_data)
+        _LOGGER.debug("Deposit success: %s", body)
+        return self._decode(Pot, body)
 
-    async def withdraw_pot(self, pot: Pot, amount: int):
+    async def withdraw_pot(self, pot: Pot, amount: int, dedupe_id: str | None = None):
         _LOGGER.debug("Depositing into pot: %s", pot.id)
-        post_data = { 'destination_account_id': pot.account_id, 'amount': amount, 'dedupe_id': secrets.token_hex()}
-        data = await self.make_request("PUT", f"pots/{pot.id}/withdraw", data=post_data)
-        _LOGGER.debug("Deposit success: %s", str(data))
-        return Pot(**data)
+        post_data = { 'destination_account_id': pot.account_id, 'amount': amount, 'dedupe_id': dedupe_id or secrets.token_hex()}
+        body = await self.make_request("PUT", f"pots/{pot.id}/withdraw", RequestPriority.WRITE, data=post_data)
+        _LOGGER.debug("Deposit success: %s", body)
+        return self._decode(Pot, body)
+
+def _format_since(since: date | datetime) -> str:
+    if isinstance(since, datetime):
+        return since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return since.strftime("%Y-%m-%dT00:00:00Z")
+
+def _transactions_url(account_id: str, since: str, limit: int) -> str:
+    return f"transactions?account_id={account_id}&since={since}&limit={limit}"
 
-async def _authorisation_expired(response: dict[str, Any]) -> bool:
-    return CODE in response and response[CODE] == TOKEN_EXPIRY_CODE
+def _retry_after(response: ClientResponse, attempt: int) -> float:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return DEFAULT_RETRY_AFTER * 2 ** attempt
 
-async def _insufficient_permissions(response: dict[str, Any]) -> bool:
-    return CODE in response and response[CODE] == TOKEN_INSUFFICIENT_PERMISSIONS
+def _backoff_delay(attempt: int) -> float:
+    """Return the delay before a retry, half fixed and half random."""
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+    return delay / 2 + random.uniform(0, delay / 2)
 
-async def _raise_auth_or_response_error(response: dict[str, Any]) -> None:
-    if _authorisation_expired(response):
-        raise AuthorisationExpiredError
-    elif _insufficient_permissions(response):
-        raise InsufficientPermissionsError
-    raise InvalidMonzoAPIResponseError
+def _endpoint_name(method: str, url: str) -> str:
+    """Name an endpoint for metrics, leaving out ids and query strings."""
+    parts = url.split("?", 1)[0].split("/")
+    name = "/".join(parts[::2])
+    return f"{method} {name}"
+
+def _authorisation_expired(error: ErrorResponse) -> bool:
+    return error.code == TOKEN_EXPIRY_CODE
+
+def _insufficient_permissions(error: ErrorResponse) -> bool:
+    return error.code == TOKEN_INSUFFICIENT_PERMISSIONS
+
+def _parse_error(body: bytes) -> ErrorResponse:
+    try:
+        return ErrorResponse.model_validate_json(body)
+    except ValidationError:
+        return ErrorResponse()
+
+def _response_error(url: str, status: int, error: ErrorResponse, body: bytes) -> Exception:
+    """Classify an error response from the Monzo API."""
+    _LOGGER.error("Monzo API request %s failed with %s: %s", url, status, body)
+    if _authorisation_expired(error):
+        return AuthorisationExpiredError(error.message)
+    if _insufficient_permissions(error):
+        return InsufficientPermissionsError(error.message)
+    if status == HTTPStatus.FORBIDDEN and url.startswith("transactions"):
+        # Older history is refused with more than one error code.
+        return InsufficientPermissionsError(error.message)
+    return InvalidMonzoAPIResponseError(status, error.code, error.message)
 
 class InvalidMonzoAPIResponseError(Exception):
     """Error thrown when the external Monzo API returns an invalid response."""
@@ -154,7 +446,7 @@ class AuthorisationExpiredError(Exception):
         super().__init__(*args)
 
 class InsufficientPermissionsError(Exception):
-    """Error thrown when the external Monzo API authentication has expired."""
+    """Error thrown when the external Monzo API refuses access to a resource."""
 
     def __init__(self, *args: object) -> None:
         """Initialise error."""
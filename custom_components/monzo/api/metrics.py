@@ -0,0 +1,121 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from time import monotonic
+from typing import Any, AsyncIterator
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class EndpointMetrics:
+    """Counters for a single API endpoint."""
+
+    requests: int = 0
+    errors: int = 0
+    bytes: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    error_codes: Counter = field(default_factory=Counter)
+
+    def record_response(self, latency: float, size: int) -> None:
+        self.requests += 1
+        self.bytes += size
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def record_error(self, code: str) -> None:
+        self.errors += 1
+        self.error_codes[code or "unknown"] += 1
+
+    @property
+    def latency_average(self) -> float:
+        return self.latency_total / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["latency_average"] = self.latency_average
+        data["latency_buckets"] = dict(
+            zip([*(f"<={bound}" for bound in LATENCY_BUCKETS), "inf"], self.latency_buckets)
+        )
+        data["error_codes"] = dict(self.error_codes)
+        return data
+
+
+@dataclass
+class CycleMetrics:
+    """Timings of a coordinator's refresh cycles."""
+
+    cycles: int = 0
+    failures: int = 0
+    last_duration: float = 0.0
+    max_duration: float = 0.0
+    last_requests: int = 0
+    last_pages: int = 0
+
+
+class ApiMetrics:
+    """Request, decode and refresh cycle metrics for a Monzo client."""
+
+    def __init__(self):
+        self.endpoints: defaultdict[str, EndpointMetrics] = defaultdict(EndpointMetrics)
+        self.cycles: defaultdict[str, CycleMetrics] = defaultdict(CycleMetrics)
+        self.decode_time: Counter = Counter()
+        self.pages = 0
+
+    @property
+    def requests(self) -> int:
+        return sum(endpoint.requests for endpoint in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(endpoint.errors for endpoint in self.endpoints.values())
+
+    @property
+    def bytes(self) -> int:
+        return sum(endpoint.bytes for endpoint in self.endpoints.values())
+
+    @property
+    def decode_time_total(self) -> float:
+        return sum(self.decode_time.values())
+
+    def record_cycle(self, name: str, duration: float, success: bool, requests: int, pages: int) -> None:
+        cycle = self.cycles[name]
+        cycle.cycles += 1
+        if not success:
+            cycle.failures += 1
+        cycle.last_duration = duration
+        cycle.max_duration = max(cycle.max_duration, duration)
+        cycle.last_requests = requests
+        cycle.last_pages = pages
+
+    @asynccontextmanager
+    async def track_cycle(self, name: str) -> AsyncIterator[None]:
+        """Record the duration and traffic of a refresh cycle."""
+        requests, pages = self.requests, self.pages
+        started = monotonic()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            self.record_cycle(
+                name, monotonic() - started, success, self.requests - requests, self.pages - pages
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "pages": self.pages,
+            "decode_time": dict(self.decode_time),
+            "endpoints": {name: endpoint.as_dict() for name, endpoint in self.endpoints.items()},
+            "cycles": {name: asdict(cycle) for name, cycle in self.cycles.items()},
+        }
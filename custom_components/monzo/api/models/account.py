@@ -11,7 +11,8 @@ ACCOUNT_NAMES = {
 
 class Account(BaseModel):
     id: str
-    account_number: str
+    # Closed accounts are listed without an account number.
+    account_number: str | None = None
     type: str
 
     @property
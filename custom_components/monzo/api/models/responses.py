@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+
+from .account import Account
+from .pot import Pot
+from .transaction import Transaction, TransactionSummary
+from .webhook import Webhook
+
+class AccountsResponse(BaseModel):
+    accounts: list[Account]
+
+class PotsResponse(BaseModel):
+    pots: list[Pot]
+
+class TransactionsResponse(BaseModel):
+    transactions: list[Transaction]
+
+class TransactionSummariesResponse(BaseModel):
+    transactions: list[TransactionSummary]
+
+class WebhooksResponse(BaseModel):
+    webhooks: list[Webhook]
+
+class WebhookResponse(BaseModel):
+    webhook: Webhook
+
+class ErrorResponse(BaseModel):
+    code: str = ""
+    message: str = ""
@@ -31,6 +31,15 @@ class Transaction(BaseModel):
     decline_reason: str | None = None
     categories: Dict[str, int] | None = None
 
+class TransactionSummary(BaseModel):
+    """The fields of a transaction needed for aggregation, the rest are skipped."""
+    account_id: str
+    amount: int
+    created: str
+    id: str
+    decline_reason: str | None = None
+    categories: Dict[str, int] | None = None
+
 class TransactionWrapper(BaseModel):
     type: Literal["transaction.created", "transaction.updated"]
     data: Transaction
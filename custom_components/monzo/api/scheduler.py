@@ -0,0 +1,115 @@
+import asyncio
+import heapq
+import itertools
+from dataclasses import dataclass
+from enum import IntEnum
+from time import monotonic
+
+
+class RequestPriority(IntEnum):
+    """Priority classes for API requests, lowest value is served first."""
+
+    WRITE = 0
+    WEBHOOK = 1
+    POLL = 2
+    # Bulk work, like history backfills, that can wait behind any refresh.
+    BACKGROUND = 3
+
+
+@dataclass
+class SchedulerStats:
+    """Counters describing how long requests waited for a slot."""
+
+    requests: int = 0
+    throttled: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    queue_depth: int = 0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+class RequestScheduler:
+    """Token bucket limiter that releases queued requests by priority.
+
+    Requests take one token each. Tokens refill at ``rate`` per second up to
+    ``burst``. When the API throttles us, ``backoff`` pauses every request
+    until the given delay has passed.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+        self.stats = SchedulerStats()
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.POLL) -> None:
+        """Wait until a request of the given priority may be sent."""
+        started = monotonic()
+        if self._waiters or not self._try_take():
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            self.stats.queue_depth = len(self._waiters)
+            self._schedule_wakeup()
+            await future
+        waited = monotonic() - started
+        self.stats.requests += 1
+        self.stats.total_wait += waited
+        self.stats.max_wait = max(self.stats.max_wait, waited)
+
+    def backoff(self, delay: float) -> None:
+        """Pause all requests for ``delay`` seconds after being throttled."""
+        self.stats.throttled += 1
+        self._paused_until = max(self._paused_until, monotonic() + delay)
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+
+    def _try_take(self) -> bool:
+        now = monotonic()
+        if now < self._paused_until:
+            return False
+        self._refill(now)
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _release_waiters(self) -> None:
+        self._wakeup = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # The waiting request was cancelled.
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+        self.stats.queue_depth = len(self._waiters)
+        if self._waiters:
+            self._schedule_wakeup()
+
+    def _schedule_wakeup(self) -> None:
+        if self._wakeup is not None:
+            return
+        now = monotonic()
+        self._refill(now)
+        delay = max(
+            self._paused_until - now,
+            (1 - self._tokens) / self._rate,
+            0,
+        )
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._release_waiters)
@@ -0,0 +1,70 @@
+import ssl
+from dataclasses import dataclass
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+
+# Enough connections for the concurrent account fetches plus the read-ahead
+# transaction pages, without opening one per request under load.
+DEFAULT_LIMIT_PER_HOST = 8
+# Refreshes fan out in bursts, keep connections long enough to span a burst.
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+# Timeouts run from when a request is sent, so time queued behind the rate
+# limit doesn't count against them.
+REQUEST_TIMEOUT = ClientTimeout(total=60, sock_connect=10, sock_read=10)
+
+
+def _accept_encoding() -> str:
+    """Return the encodings aiohttp can decode here."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+@dataclass
+class ConnectionStats:
+    """How often requests reused a pooled connection."""
+
+    created: int = 0
+    reused: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+
+def create_session(
+    stats: ConnectionStats,
+    ssl_context: ssl.SSLContext | bool | None = None,
+    limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+) -> ClientSession:
+    """Create a session with its own connection pool for the Monzo API."""
+
+    async def on_connection_create_end(session, context, params) -> None:
+        stats.created += 1
+
+    async def on_connection_reuseconn(session, context, params) -> None:
+        stats.reused += 1
+
+    trace_config = TraceConfig()
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+
+    connector = TCPConnector(
+        limit_per_host=limit_per_host,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        ssl=ssl_context if ssl_context is not None else True,
+    )
+    return ClientSession(
+        connector=connector,
+        headers={"Accept-Encoding": _accept_encoding()},
+        timeout=REQUEST_TIMEOUT,
+        trace_configs=[trace_config],
+    )
@@ -0,0 +1,98 @@
+import json
+import re
+
+# Bytes that change the scanner's state outside and inside strings.
+_STRUCTURAL = re.compile(rb'[][{}"]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+_SEEKING = 0
+_IN_ARRAY = 1
+_DONE = 2
+
+
+class JsonArraySplitter:
+    """Split the elements of one array in a JSON object out of a byte stream.
+
+    Chunks are fed in as they arrive and each complete element of the array
+    under ``key`` in the top level object is returned as raw JSON, ready for
+    ``model_validate_json``. Only the element being read is buffered. The
+    elements are expected to be objects or arrays, anything else is skipped.
+    """
+
+    def __init__(self, key: str):
+        self._key = json.dumps(key).encode()
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._state = _SEEKING
+        self._in_string = False
+        self._string_start = 0
+        self._last_string = b""
+        self._element_start: int | None = None
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Add a chunk of the body, returning the elements it completed."""
+        buffer = self._buffer
+        buffer += chunk
+        elements = []
+        pos = self._pos
+        while self._state != _DONE:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match[0] == b"\\":
+                    if match.end() == len(buffer):
+                        # The escaped byte is in the next chunk.
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                if self._depth == 1:
+                    self._last_string = bytes(buffer[self._string_start:pos])
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match[0]
+            pos = match.end()
+            if char == b'"':
+                self._in_string = True
+                self._string_start = match.start()
+            elif char in b"{[":
+                if self._state == _IN_ARRAY and self._depth == 2:
+                    self._element_start = match.start()
+                elif char == b"[" and self._depth == 1 and self._last_string == self._key:
+                    self._state = _IN_ARRAY
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._state == _IN_ARRAY:
+                    if self._depth == 2:
+                        elements.append(bytes(buffer[self._element_start:pos]))
+                        self._element_start = None
+                    elif self._depth == 1:
+                        self._state = _DONE
+
+        # Drop everything that has been scanned and isn't needed any more.
+        keep = pos
+        if self._element_start is not None:
+            keep = self._element_start
+        elif self._in_string:
+            keep = self._string_start
+        del buffer[:keep]
+        self._pos = pos - keep
+        if self._element_start is not None:
+            self._element_start -= keep
+        self._string_start -= keep
+        return elements
+
+    def close(self) -> None:
+        """Raise ValueError unless the whole array was read."""
+        if self._state != _DONE:
+            raise ValueError(f"Response ended before the end of the {self._key.decode()} array")
@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 import logging
 from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlowResult
+from homeassistant.config_entries import ConfigEntry, ConfigFlowResult
 from homeassistant.const import CONF_TOKEN
 from homeassistant.helpers import config_entry_oauth2_flow
 
@@ -22,6 +23,7 @@ class OAuth2FlowHandler(
     DOMAIN = DOMAIN
 
     oauth_data: dict[str, Any]
+    reauth_entry: ConfigEntry | None = None
 
     @property
     def logger(self) -> logging.Logger:
@@ -33,6 +35,10 @@ class OAuth2FlowHandler(
     ) -> ConfigFlowResult:
         """Wait for the user to confirm in-app approval."""
         if user_input is not None:
+            if self.reauth_entry is not None:
+                return self.async_update_reload_and_abort(
+                    self.reauth_entry, data={**self.reauth_entry.data, **self.oauth_data}
+                )
             return self.async_create_entry(title=DOMAIN, data={**self.oauth_data})
 
         data_schema = vol.Schema({vol.Required("confirm"): bool})
@@ -45,8 +51,25 @@ class OAuth2FlowHandler(
         """Create an entry for the flow."""
         user_id = str(data[CONF_TOKEN]["user_id"])
         await self.async_set_unique_id(user_id)
-        self._abort_if_unique_id_configured()
+        if self.reauth_entry is not None:
+            if self.reauth_entry.unique_id != user_id:
+                return self.async_abort(reason="wrong_account")
+        else:
+            self._abort_if_unique_id_configured()
 
         self.oauth_data = data
 
-        return await self.async_step_await_approval_confirmation()
\ No newline at end of file
+        return await self.async_step_await_approval_confirmation()
+
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> ConfigFlowResult:
+        """Start reauthentication after the token was refused."""
+        self.reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Confirm reauthentication."""
+        if user_input is None:
+            return self.async_show_form(step_id="reauth_confirm")
+        return await self.async_step_user()
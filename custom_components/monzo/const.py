@@ -1,5 +1,7 @@
 """Constants used for Monzo."""
 
+from datetime import timedelta
+
 DOMAIN = "monzo"
 
 OAUTH2_AUTHORIZE = "https://auth.monzo.com"
@@ -13,5 +15,27 @@ WEBHOOK_UPDATE = f"{DOMAIN}_webhook_update"
 
 SERVICE_POT_DEPOSIT = "pot_deposit"
 SERVICE_POT_WITHDRAW = "pot_withdraw"
+SERVICE_POT_TRANSFERS = "pot_transfers"
 SERVICE_UPDATE = "update"
-SERVICE_CATEGORY_UPDATE = "category_update"
\ No newline at end of file
+SERVICE_CATEGORY_UPDATE = "category_update"
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+TIER_BALANCES = "balances"
+TIER_POTS = "pots"
+TIER_ACCOUNTS = "accounts"
+TIER_WEBHOOKS = "webhooks"
+REFRESH_TIERS = (TIER_BALANCES, TIER_POTS, TIER_ACCOUNTS, TIER_WEBHOOKS)
+# Tiers without an interval are only refreshed at startup or on demand.
+TIER_INTERVALS = {
+    TIER_BALANCES: timedelta(minutes=30),
+    TIER_POTS: timedelta(hours=6),
+}
+
+# Account types whose spending counts towards the category budgets.
+CATEGORY_ACCOUNT_TYPES = ("uk_retail", "uk_retail_joint")
+
+TRANSACTION_STORAGE_VERSION = 2
+SNAPSHOT_STORAGE_VERSION = 1
+TRANSACTION_SYNC_OVERLAP = timedelta(days=3)
+STATISTICS_STORAGE_VERSION = 1
@@ -0,0 +1,45 @@
+"""Diagnostics support for Monzo."""
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_TOKEN, CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .monzo_data import MonzoData
+
+TO_REDACT = {CONF_TOKEN, CONF_WEBHOOK_ID}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    client: MonzoData = hass.data[DOMAIN][entry.entry_id]["client"]
+    cache = client.cache
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "metrics": client.metrics.as_dict(),
+        "scheduler": {
+            **asdict(client.request_stats),
+            "average_wait": client.request_stats.average_wait,
+        },
+        "circuit_breaker": {
+            "state": client.breaker.state,
+            "retry_in": client.breaker.retry_in,
+            **asdict(client.breaker.stats),
+        },
+        "connections": {
+            **asdict(client.connection_stats),
+            "reuse_ratio": client.connection_stats.reuse_ratio,
+        },
+        "cache": {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "collapsed": cache.collapsed,
+        },
+    }
@@ -1,24 +1,97 @@
-from aiohttp import ClientSession
+import asyncio
+import logging
+import time
 
 from .api.auth import AbstractAuth
 
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.helpers import config_entry_oauth2_flow
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+# Refresh the access token this many seconds before it expires.
+TOKEN_REFRESH_MARGIN = 300
+# Never schedule background refreshes closer together than this, so a failing
+# token endpoint isn't retried on every request.
+MIN_REFRESH_DELAY = 30
 
 class AsyncConfigEntryAuth(AbstractAuth):
     """Provide Monzo authentication tied to an OAuth2 based config entry."""
 
     def __init__(
         self,
-        websession: ClientSession,
         oauth_session: config_entry_oauth2_flow.OAuth2Session,
     ) -> None:
         """Initialize Monzo auth."""
-        super().__init__(websession)
         self._oauth_session = oauth_session
+        self._refresh_task: asyncio.Task | None = None
+        self._unsub_refresh: CALLBACK_TYPE | None = None
 
     async def async_get_access_token(self) -> str:
         """Return a valid access token."""
         if not self._oauth_session.valid_token:
-            await self._oauth_session.async_ensure_token_valid()
+            await self._async_refresh_token(force=False)
+        elif self._unsub_refresh is None and self._refresh_task is None:
+            self._schedule_refresh()
+
+        return self._oauth_session.token["access_token"]
+
+    async def async_refresh_access_token(self) -> None:
+        """Refresh the access token after the API rejected it as expired."""
+        await self._async_refresh_token(force=True)
+
+    async def _async_refresh_token(self, force: bool) -> None:
+        """Refresh the token, sharing a single refresh between all callers."""
+        if self._refresh_task is None:
+            self._refresh_task = self._oauth_session.hass.async_create_task(
+                self._async_do_refresh(force)
+            )
+        await asyncio.shield(self._refresh_task)
+
+    async def _async_do_refresh(self, force: bool) -> None:
+        try:
+            if force:
+                session = self._oauth_session
+                new_token = await session.implementation.async_refresh_token(session.token)
+                session.hass.config_entries.async_update_entry(
+                    session.config_entry, data={**session.config_entry.data, "token": new_token}
+                )
+            else:
+                await self._oauth_session.async_ensure_token_valid()
+        finally:
+            self._refresh_task = None
+        self._schedule_refresh()
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Refresh the token in the background shortly before it expires."""
+        self.async_shutdown()
+        expires_at = self._oauth_session.token.get("expires_at")
+        if expires_at is None:
+            return
+        delay = max(expires_at - time.time() - TOKEN_REFRESH_MARGIN, MIN_REFRESH_DELAY)
+        self._unsub_refresh = async_call_later(
+            self._oauth_session.hass, delay, self._async_proactive_refresh
+        )
+
+    @callback
+    def _async_proactive_refresh(self, _now) -> None:
+        self._unsub_refresh = None
+        self._oauth_session.hass.async_create_background_task(
+            self._async_proactive_refresh_task(), "monzo_token_refresh"
+        )
+
+    async def _async_proactive_refresh_task(self) -> None:
+        try:
+            await self._async_refresh_token(force=True)
+        except Exception:  # pylint: disable=broad-except
+            # Requests fall back to refreshing on demand.
+            _LOGGER.warning("Background Monzo token refresh failed", exc_info=True)
 
-        return self._oauth_session.token["access_token"]
\ No newline at end of file
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel any scheduled token refresh."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
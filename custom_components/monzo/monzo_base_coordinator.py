@@ -0,0 +1,55 @@
+"""Coordinator base notifying only the entities whose data changed."""
+
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+
+from .api.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def changed_idx(old: Mapping[str, Any], new: Mapping[str, Any]) -> set[str]:
+    """Return the keys whose value differs between two lookup tables."""
+    changed = {idx for idx, item in new.items() if old.get(idx) != item}
+    changed.update(idx for idx in old if idx not in new)
+    return changed
+
+
+class MonzoBaseCoordinator(DataUpdateCoordinator):
+    """Coordinator whose updates can be limited to a set of contexts.
+
+    Setting ``_notify_idx`` before listeners are updated limits the update
+    to entities with those contexts. Entities without a context, and every
+    entity when availability changes, are always updated.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._notify_idx: set[str] | None = None
+        self._notified_success = True
+
+    def _raise_if_circuit_open(self, breaker: CircuitBreaker) -> None:
+        """Fail the refresh without any requests while the API is unavailable."""
+        if breaker.state == CircuitState.OPEN:
+            raise UpdateFailed(f"Monzo API unavailable, retrying in {breaker.retry_in:.0f}s")
+
+    def _set_changed(self, new: Mapping[str, Any]) -> None:
+        """Limit the next update to the entries that differ from the current data."""
+        self._notify_idx = None if self.data is None else changed_idx(self.data, new)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners, limited to the entities whose data changed."""
+        notify_idx, self._notify_idx = self._notify_idx, None
+        success_changed = self.last_update_success != self._notified_success
+        self._notified_success = self.last_update_success
+        if notify_idx is None or success_changed:
+            super().async_update_listeners()
+            return
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in notify_idx:
+                update_callback()
@@ -1,18 +1,33 @@
 """Example integration using DataUpdateCoordinator."""
 
-from datetime import timedelta, date
+from datetime import timedelta, datetime
 import logging
 import asyncio
+from collections.abc import Callable
+from contextlib import aclosing
 from functools import reduce
 from typing import Any, AsyncIterator
 
-import async_timeout
 from .api.models.transaction import Transaction
 
-from .monzo_data import MonzoData
-from homeassistant.helpers.update_coordinator import (
-    DataUpdateCoordinator,
+from .const import CATEGORY_ACCOUNT_TYPES, WEBHOOK_UPDATE
+from .api.circuit_breaker import CircuitOpenError
+from .api.client import (
+    AuthorisationExpiredError,
+    InsufficientPermissionsError,
+    InvalidMonzoAPIResponseError,
 )
+from .monzo_base_coordinator import MonzoBaseCoordinator
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from .monzo_data import MonzoData
+from .api.scheduler import RequestPriority
+from .spend_windows import WINDOW_PERIOD, SpendAggregator, SpendTotals
+from .transaction_store import MonzoTransactionStore
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
 
 from .api.models.pot import Pot
 
@@ -51,15 +66,39 @@ CATEGORY_LIST = {
     # ('personal_care', 'Personal Care'),
 }
 
+def category_amounts(record: dict[str, Any] | None) -> dict[str, int]:
+    """Return the tracked category splits a stored transaction contributes."""
+    if record is None or record["declined"]:
+        return {}
+    return {
+        category: amount
+        for category, amount in record["categories"].items()
+        if category in CATEGORY_LIST
+    }
+
 class Category:
-    def __init__(self, id, amount):
+    def __init__(self, id, windows: dict[str, SpendTotals]):
         self.id = id
         self.name = CATEGORY_LIST[id][0]
         self.target = CATEGORY_LIST[id][1]
-        self.amount = amount
+        # Spend per window, the budget is tracked against the period.
+        self.windows = windows
+
+    @property
+    def amount(self) -> int:
+        return self.windows[WINDOW_PERIOD].amount
 
-class MonzoCategoryUpdateCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, client: MonzoData, accountIds):
+    @property
+    def accounts(self) -> dict[str, int]:
+        return self.windows[WINDOW_PERIOD].accounts
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Category):
+            return NotImplemented
+        return self.id == other.id and self.windows == other.windows
+
+class MonzoCategoryUpdateCoordinator(MonzoBaseCoordinator):
+    def __init__(self, hass, client: MonzoData, transaction_store: MonzoTransactionStore, accountIds=None):
         """Initialize my coordinator."""
         super().__init__(
             hass,
@@ -71,6 +110,28 @@ class MonzoCategoryUpdateCoordinator(DataUpdateCoordinator):
         )
         self._monzo_client = client
         self._accountIds = accountIds
+        self._account_names: dict[str, str] = {}
+        self._transaction_store = transaction_store
+        self._aggregator: SpendAggregator | None = None
+        # Accounts the API refused transactions for.
+        self._forbidden: set[str] = set()
+        self._backfill_task: asyncio.Task | None = None
+
+    @property
+    def account_ids(self) -> list[str] | None:
+        return self._accountIds
+
+    @property
+    def account_names(self) -> dict[str, str]:
+        return self._account_names
+
+    @callback
+    def async_restore(self, account_ids: list[str], account_names: dict[str, str]) -> None:
+        """Serve totals from the stored transactions ahead of the first refresh."""
+        if self._accountIds is None:
+            self._accountIds = account_ids
+        self._account_names = account_names
+        self.async_set_updated_data(self._aggregate(SpendAggregator(dt_util.utcnow())))
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
@@ -78,34 +139,216 @@ class MonzoCategoryUpdateCoordinator(DataUpdateCoordinator):
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
         """
-        # try:
         # Note: asyncio.TimeoutError and aiohttp.ClientError are already
-        # handled by the data update coordinator.
-        async with async_timeout.timeout(10):
-            # Grab active context variables to limit data required to be fetched from API
-            # Note: using context is not required if there is no need or ability to limit
-            # data retrieved from API.
-            listening_idx = set(self.async_contexts())
-            twenty_eighth = date.today().replace(day=28)
-            if date.today() < twenty_eighth:
-                twenty_eighth = twenty_eighth.replace(month=twenty_eighth.month-1)
-            data = self._monzo_client.async_get_transactions(self._accountIds[0], twenty_eighth)
-            categories: dict[str, Category] = {}
-            for category, _details in CATEGORY_LIST.items():
-                categories[category] = Category(category, 0)
-            async for transaction in data:
-                if transaction.decline_reason is None:
-                    for category, amount in transaction.categories.items():
-                        if category in CATEGORY_LIST:
-                            if category in categories:
-                                categories[category].amount += amount
-            return categories
-        # except ApiAuthError as err:
-        #     # Raising ConfigEntryAuthFailed will cancel future updates
-        #     # and start a config flow with SOURCE_REAUTH (async_step_reauth)
-        #     raise ConfigEntryAuthFailed from err
-        # except ApiError as err:
-        #     raise UpdateFailed(f"Error communicating with API: {err}")
+        # handled by the data update coordinator. Each request has its own
+        # timeout, so a refresh queued behind the rate limit isn't cut short.
+        self._raise_if_circuit_open(self._monzo_client.breaker)
+        try:
+            async with self._monzo_client.metrics.track_cycle(self.name):
+                # Grab active context variables to limit data required to be fetched from API
+                # Note: using context is not required if there is no need or ability to limit
+                # data retrieved from API.
+                listening_idx = set(self.async_contexts())
+                if self._accountIds is None or not self._account_names:
+                    await self._async_resolve_accounts()
+                aggregator = SpendAggregator(dt_util.utcnow())
+                retention_start = aggregator.retention_start
+                current_start = aggregator.current_start
+                account_ids = [
+                    account_id for account_id in self._accountIds if account_id not in self._forbidden
+                ]
+                # Accounts are paged concurrently, so a refresh takes as long as
+                # the busiest account rather than the sum of them.
+                results = await asyncio.gather(
+                    *(
+                        self._async_sync_account(account_id, retention_start, current_start)
+                        for account_id in account_ids
+                    ),
+                    return_exceptions=True,
+                )
+                errors = []
+                # Totals for accounts that aren't synced use what is already stored.
+                for account_id, result in zip(account_ids, results):
+                    if isinstance(result, AuthorisationExpiredError):
+                        raise result
+                    if isinstance(result, InsufficientPermissionsError):
+                        # Not every account type allows transactions, stop asking.
+                        _LOGGER.info("Skipping Monzo transactions for %s: %s", account_id, result)
+                        self._forbidden.add(account_id)
+                    elif isinstance(result, Exception):
+                        _LOGGER.warning("Failed to sync Monzo transactions for %s: %s", account_id, result)
+                        errors.append(result)
+                    elif isinstance(result, BaseException):
+                        raise result
+                if errors and len(errors) == len(account_ids):
+                    # Keep what was synced, a cold sync resumes from there.
+                    await self._transaction_store.async_save()
+                    raise errors[0]
+                self._transaction_store.prune(retention_start)
+                self._transaction_store.async_schedule_save()
+                categories = self._aggregate(aggregator)
+                self._set_changed(categories)
+                self._async_start_backfill()
+                return categories
+        except AuthorisationExpiredError as err:
+            # Raising ConfigEntryAuthFailed will cancel future updates
+            # and start a config flow with SOURCE_REAUTH (async_step_reauth)
+            raise ConfigEntryAuthFailed from err
+        except (CircuitOpenError, InvalidMonzoAPIResponseError) as err:
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+    def _aggregate(self, aggregator: SpendAggregator) -> dict[str, Category]:
+        """Total every window from the stored transactions in one pass."""
+        self._aggregator = aggregator
+        categories: dict[str, Category] = {}
+        for category, _details in CATEGORY_LIST.items():
+            categories[category] = Category(category, aggregator.new_totals())
+        for account_id, created, category, amount in self._transaction_store.splits(self._accountIds):
+            item = categories.get(category)
+            if item is None:
+                continue
+            account_name = self._account_names.get(account_id, account_id)
+            for window in aggregator.windows_for(created):
+                item.windows[window].add(account_name, amount)
+        return categories
+
+    async def _async_resolve_accounts(self) -> None:
+        """Select the accounts to aggregate and look up their names."""
+        # Shares the cached accounts listing with the main coordinator.
+        accounts = await self._monzo_client.async_update_accounts_list()
+        self._forbidden.clear()
+        if self._accountIds is None:
+            self._accountIds = [
+                account.id for account in accounts if account.type in CATEGORY_ACCOUNT_TYPES
+            ]
+        self._account_names = {account.id: account.name for account in accounts}
+
+    async def _async_sync_account(
+        self, account_id: str, retention_start: datetime, current_start: datetime
+    ) -> None:
+        """Stream new transactions for an account into the store.
+
+        An account with nothing stored is only synced from where the open
+        windows start. The rest of its history is backfilled afterwards, so
+        the first refresh doesn't wait on it.
+        """
+        store = self._transaction_store
+        floor = store.backfill_until(account_id)
+        if floor is None and store.cursor(account_id) is None and current_start > retention_start:
+            floor = current_start
+            store.set_backfill_until(account_id, floor)
+        since = store.sync_start(account_id, max(floor or retention_start, retention_start))
+        async for transaction in self._monzo_client.async_get_transactions(account_id, since, summary=True):
+            store.upsert(transaction)
+
+    @callback
+    def _async_start_backfill(self) -> None:
+        """Backfill older history in the background, if any account needs it."""
+        if self._backfill_task is not None or not any(
+            self._transaction_store.backfill_until(account_id) is not None
+            for account_id in self._accountIds
+        ):
+            return
+        self._backfill_task = self.hass.async_create_background_task(
+            self._async_backfill(), "monzo_category_backfill"
+        )
+
+    async def _async_backfill(self) -> None:
+        """Fetch the history accounts were not synced from, then re-total.
+
+        Accounts that fail keep their marker and are retried after the next
+        refresh.
+        """
+        store = self._transaction_store
+        try:
+            retention_start = SpendAggregator(dt_util.utcnow()).retention_start
+            for account_id in self._accountIds:
+                until = store.backfill_until(account_id)
+                if until is None or account_id in self._forbidden:
+                    continue
+                if until > retention_start:
+                    try:
+                        await self._async_sync_range(account_id, retention_start, until)
+                    except Exception as err:  # pylint: disable=broad-except
+                        _LOGGER.warning("Failed to backfill Monzo transactions for %s: %s", account_id, err)
+                        continue
+                store.set_backfill_until(account_id, None)
+            store.async_schedule_save()
+            self._async_roll_windows(None)
+        finally:
+            self._backfill_task = None
+
+    async def _async_sync_range(self, account_id: str, start: datetime, end: datetime) -> None:
+        """Store the transactions of an account created in ``[start, end)``."""
+        transactions = self._monzo_client.async_get_transactions(
+            account_id, start, summary=True, priority=RequestPriority.BACKGROUND
+        )
+        async with aclosing(transactions):
+            async for transaction in transactions:
+                if dt_util.parse_datetime(transaction.created) >= end:
+                    break
+                self._transaction_store.upsert(transaction)
+
+    async def async_shutdown(self) -> None:
+        """Stop any backfill along with the coordinator."""
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+        await super().async_shutdown()
+
+    def async_setup_webhook_listeners(self) -> Callable[[], None]:
+        """Apply webhook transactions to the category totals as they arrive.
+
+        Must be called after the first refresh has resolved the account ids.
+        """
+        unsubscribes = [
+            async_dispatcher_connect(
+                self.hass, f"{WEBHOOK_UPDATE}-{account_id}", self._async_handle_transaction
+            )
+            for account_id in self._accountIds
+        ]
+        # Day and week windows roll over without needing new transactions.
+        unsubscribes.append(
+            async_track_time_change(self.hass, self._async_roll_windows, hour=0, minute=0, second=0)
+        )
+
+        def unsubscribe() -> None:
+            for unsub in unsubscribes:
+                unsub()
+
+        return unsubscribe
+
+    @callback
+    def _async_handle_transaction(self, event_type: str, transaction: Transaction) -> None:
+        """Apply a created or updated transaction as a delta on its categories."""
+        if self.data is None:
+            return
+        created = dt_util.parse_datetime(transaction.created)
+        if created < self._aggregator.retention_start:
+            return
+        previous = self._transaction_store.upsert(transaction)
+        current = self._transaction_store.get(transaction.account_id, transaction.id)
+        _LOGGER.debug("Applying %s to categories: %s", event_type, transaction.id)
+        account_name = self._account_names.get(transaction.account_id, transaction.account_id)
+        totals = {category: item.windows for category, item in self.data.items()}
+        previous_amounts = category_amounts(previous)
+        current_amounts = category_amounts(current)
+        if previous is not None:
+            self._aggregator.add(totals, account_name, previous["created"], previous_amounts, -1)
+        self._aggregator.add(totals, account_name, current["created"], current_amounts)
+        self._transaction_store.async_schedule_save()
+        self._notify_idx = set(previous_amounts) | set(current_amounts)
+        self.async_update_listeners()
+
+    @callback
+    def _async_roll_windows(self, _now) -> None:
+        """Re-total the windows from the store with new boundaries."""
+        if self.data is None:
+            return
+        # Not a refresh, so the polling schedule is left alone.
+        categories = self._aggregate(SpendAggregator(dt_util.utcnow()))
+        self._set_changed(categories)
+        self.data = categories
+        self.async_update_listeners()
 
     async def async_force_update(self):
         if not sem.locked():
@@ -1,62 +1,315 @@
-from typing import AsyncIterator
+import asyncio
+import logging
+from typing import Any, AsyncIterator
 
-from .api.models.transaction import Transaction
-from .const import API_ENDPOINT
+from .api.models.transaction import Transaction, TransactionSummary
+from .const import (
+    API_ENDPOINT,
+    DEFAULT_MAX_CONCURRENCY,
+    TIER_ACCOUNTS,
+    TIER_BALANCES,
+    TIER_POTS,
+    TIER_WEBHOOKS,
+)
 from .monzo import AbstractAuth
-from .api.client import MonzoClient
+from .api.circuit_breaker import CircuitBreaker
+from .api.client import AuthorisationExpiredError, InsufficientPermissionsError, MonzoClient
+from .api.cache import ResponseCache
+from .api.metrics import ApiMetrics
+from .api.scheduler import RequestPriority, SchedulerStats
+from .api.session import ConnectionStats
+from .api.models.account import Account
+from .api.models.balance import Balance
 from .api.models.pot import Pot
+from .api.models.webhook import Webhook
+from .pot_transfers import DIRECTION_DEPOSIT, AppliedPotMoves, PotTransfer
+
+_LOGGER = logging.getLogger(__name__)
 
 class MonzoData:
-    def __init__(self, auth: AbstractAuth):
-        self._monzo_client = MonzoClient(auth, API_ENDPOINT)
+    def __init__(self, auth: AbstractAuth, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, host: str = API_ENDPOINT, **client_options):
+        self._monzo_client = MonzoClient(auth, host, **client_options)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._accounts: list[Account] | None = None
+        self._balances: dict[str, Balance] = {}
+        self._pots: dict[str, list[Pot]] = {}
+        self._webhooks: dict[str, list[Webhook]] = {}
+        self._known_accounts: set[str] = set()
+        # Resources the API refused access to, as (tier, account id).
+        self._forbidden: set[tuple[str, str]] = set()
+        self._applied_pot_moves = AppliedPotMoves()
         self.webhooks = {}
 
-    async def async_update_coordinated(self, _listening_idx):
-        lookup_table = {}
-        accounts = await self.async_update_accounts_list()
+    @property
+    def request_stats(self) -> SchedulerStats:
+        return self._monzo_client.scheduler.stats
+
+    @property
+    def metrics(self) -> ApiMetrics:
+        return self._monzo_client.metrics
+
+    @property
+    def connection_stats(self) -> ConnectionStats:
+        return self._monzo_client.connection_stats
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._monzo_client.breaker
+
+    @property
+    def cache(self) -> ResponseCache:
+        return self._monzo_client.cache
+
+    def invalidate_cache(self, prefix: str = "") -> None:
+        self._monzo_client.invalidate_cache(prefix)
+
+    async def async_close(self) -> None:
+        await self._monzo_client.async_close()
+
+    async def async_update_coordinated(
+        self,
+        listening_idx: set[str] | None,
+        tiers: set[str],
+        priority: RequestPriority = RequestPriority.POLL,
+    ):
+        """Refresh the given tiers and return the full lookup table.
+
+        Balances and pots are only fetched for accounts with a listening
+        entity, or for every account when ``listening_idx`` is None. Accounts
+        seen for the first time are fetched in full. Anything not fetched, or
+        that fails to fetch, keeps its last known value.
+        """
+        if self._accounts is None or TIER_ACCOUNTS in tiers:
+            self._accounts = await self.async_update_accounts_list(priority)
+            self._forbidden.clear()
+        accounts = self._accounts
+
+        jobs = []
+
+        def add_job(tier: str, target: dict, account_id: str, fetch) -> None:
+            if (tier, account_id) not in self._forbidden:
+                jobs.append((tier, target, account_id, fetch(account_id, priority)))
+
         for account in accounts:
-            balance = await self.async_update_balance_for_account(account.id)
-            balance.name = account.name
-            pots = await self.async_update_pots_for_account(account.id)
-            webhooks = await self.async_update_webhooks_for_account(account.id)
-            lookup_table[account.id] = balance
-            for pot in pots:
+            known = account.id in self._known_accounts
+            if not known or (
+                TIER_BALANCES in tiers
+                and (listening_idx is None or account.id in listening_idx)
+            ):
+                add_job(TIER_BALANCES, self._balances, account.id, self.async_update_balance_for_account)
+            if not known or (
+                TIER_POTS in tiers
+                and (listening_idx is None or any(
+                    pot.id in listening_idx for pot in self._pots.get(account.id, ())
+                ))
+            ):
+                add_job(TIER_POTS, self._pots, account.id, self.async_update_pots_for_account)
+            if not known or TIER_WEBHOOKS in tiers:
+                add_job(TIER_WEBHOOKS, self._webhooks, account.id, self.async_update_webhooks_for_account)
+
+        results = await asyncio.gather(
+            *(self._async_limited(coro) for _, _, _, coro in jobs),
+            return_exceptions=True,
+        )
+        errors = []
+        failed = set()
+        for (tier, target, account_id, _), result in zip(jobs, results):
+            if isinstance(result, AuthorisationExpiredError):
+                raise result
+            if isinstance(result, InsufficientPermissionsError):
+                # Not every account type allows every resource, stop asking.
+                _LOGGER.info("Skipping Monzo %s for account %s: %s", tier, account_id, result)
+                self._forbidden.add((tier, account_id))
+            elif isinstance(result, Exception):
+                # Keep serving the last good values for this account rather
+                # than failing the whole refresh.
+                _LOGGER.warning("Failed to update Monzo account %s: %s", account_id, result)
+                errors.append(result)
+                failed.add(account_id)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                target[account_id] = result
+        # Accounts with a failed fetch are fetched in full again next time.
+        self._known_accounts.update(
+            account_id for _, _, account_id, _ in jobs if account_id not in failed
+        )
+
+        # Cached values alone don't make a refresh a success.
+        if jobs and len(errors) == len(jobs):
+            raise errors[0]
+        return self._lookup_table()
+
+    def _lookup_table(self) -> dict[str, Balance | Pot | Webhook]:
+        lookup_table = {}
+        for account in self._accounts or ():
+            balance = self._balances.get(account.id)
+            if balance is not None:
+                balance.name = account.name
+                lookup_table[account.id] = balance
+            for pot in self._pots.get(account.id, ()):
                 pot.account_id = account.id
                 lookup_table[pot.id] = pot
-            for webhook in webhooks:
+            for webhook in self._webhooks.get(account.id, ()):
                 lookup_table[webhook.id] = webhook
         return lookup_table
 
-    async def async_update_accounts_list(self):
-        accounts = await self._monzo_client.get_accounts()
+    def snapshot(self) -> dict[str, Any]:
+        """Return the last fetched accounts, balances, pots and webhooks."""
+        return {
+            "accounts": [account.model_dump(mode="json") for account in self._accounts or ()],
+            "balances": {
+                account_id: balance.model_dump(mode="json") for account_id, balance in self._balances.items()
+            },
+            "pots": {
+                account_id: [pot.model_dump(mode="json") for pot in pots] for account_id, pots in self._pots.items()
+            },
+            "webhooks": {
+                account_id: [webhook.model_dump(mode="json") for webhook in webhooks]
+                for account_id, webhooks in self._webhooks.items()
+            },
+        }
+
+    def restore(self, snapshot: dict[str, Any]) -> dict[str, Balance | Pot | Webhook]:
+        """Load a snapshot and return its lookup table.
+
+        Restored accounts are still fetched in full on the next refresh.
+        """
+        self._accounts = [Account.model_validate(account) for account in snapshot["accounts"]]
+        self._balances = {
+            account_id: Balance.model_validate(balance)
+            for account_id, balance in snapshot["balances"].items()
+        }
+        self._pots = {
+            account_id: [Pot.model_validate(pot) for pot in pots]
+            for account_id, pots in snapshot["pots"].items()
+        }
+        self._webhooks = {
+            account_id: [Webhook.model_validate(webhook) for webhook in webhooks]
+            for account_id, webhooks in snapshot["webhooks"].items()
+        }
+        return self._lookup_table()
+
+    async def _async_limited(self, coro):
+        async with self._semaphore:
+            return await coro
+
+    async def async_update_accounts_list(self, priority: RequestPriority = RequestPriority.POLL):
+        accounts = await self._monzo_client.get_accounts(priority)
         return accounts
 
-    async def async_update_balance_for_account(self, account_id):
-        return await self._monzo_client.get_balance(account_id)
+    async def async_update_balance_for_account(self, account_id, priority: RequestPriority = RequestPriority.POLL):
+        return await self._monzo_client.get_balance(account_id, priority)
     
-    def async_get_transactions(self, account_id, start_date) -> AsyncIterator[Transaction]:
-        return self._monzo_client.async_get_transactions(account_id, start_date)
+    def async_get_transactions(
+        self,
+        account_id,
+        start_date,
+        summary: bool = False,
+        stream: bool = False,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> AsyncIterator[Transaction | TransactionSummary]:
+        return self._monzo_client.async_get_transactions(
+            account_id, start_date, priority=priority, summary=summary, stream=stream
+        )
 
-    async def async_update_pots_for_account(self, account_id):
-        return await self._monzo_client.get_pots(account_id)
+    async def async_update_pots_for_account(self, account_id, priority: RequestPriority = RequestPriority.POLL):
+        return await self._monzo_client.get_pots(account_id, priority)
 
-    async def async_update_webhooks_for_account(self, account_id):
-        return await self._monzo_client.get_webhooks(account_id)
+    async def async_update_webhooks_for_account(self, account_id, priority: RequestPriority = RequestPriority.POLL):
+        return await self._monzo_client.get_webhooks(account_id, priority)
+
+    async def async_reconcile_webhooks(self, account_ids, url):
+        """Make sure every account has a webhook for the given url.
+
+        Accounts whose listing from the last refresh already has the webhook
+        are skipped, the rest are registered concurrently.
+        """
+        missing = [
+            account_id
+            for account_id in account_ids
+            if all(webhook.url != url for webhook in self._webhooks.get(account_id, ()))
+        ]
+        results = await asyncio.gather(
+            *(self._async_limited(self.register_webhook(account_id, url)) for account_id in missing),
+            return_exceptions=True,
+        )
+        for account_id, result in zip(missing, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning("Failed to register Monzo webhook for %s: %s", account_id, result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                _LOGGER.info("Registered Monzo account webhook: %s : %s", account_id, url)
 
     async def register_webhook(self, account_id, url):
-        self.webhooks[account_id] = await self._monzo_client.register_webhook(account_id, url)
+        webhook = await self._monzo_client.register_webhook(account_id, url)
+        self.webhooks[account_id] = webhook
+        webhooks = self._webhooks.setdefault(account_id, [])
+        if all(existing.id != webhook.id for existing in webhooks):
+            webhooks.append(webhook)
 
     async def unregister_webhook(self, webhook_id):
         await self._monzo_client.unregister_webhook(webhook_id)
+        for account_id, webhooks in self._webhooks.items():
+            self._webhooks[account_id] = [webhook for webhook in webhooks if webhook.id != webhook_id]
 
-    async def deposit_pot(self, pot: Pot, amount: int):
-        new_pot = await self._monzo_client.deposit_pot(pot, amount)
+    async def deposit_pot(self, pot: Pot, amount: int, dedupe_id: str | None = None):
+        new_pot = await self._monzo_client.deposit_pot(pot, amount, dedupe_id)
         pot.balance = new_pot.balance
         new_pot.account_id = pot.account_id
         return new_pot
 
-    async def withdraw_pot(self, pot: Pot, amount: int):
-        new_pot = await self._monzo_client.withdraw_pot(pot, amount)
+    async def withdraw_pot(self, pot: Pot, amount: int, dedupe_id: str | None = None):
+        new_pot = await self._monzo_client.withdraw_pot(pot, amount, dedupe_id)
         pot.balance = new_pot.balance
         new_pot.account_id = pot.account_id
         return new_pot
+
+    async def async_pot_transfers(self, transfers: list[PotTransfer]) -> list[Exception | None]:
+        """Run transfers concurrently, returning the error of each or None.
+
+        Pots are updated with the balance Monzo returns and their account's
+        balance is adjusted to match, ahead of the next refresh. Each move is
+        recorded before it is sent, so its webhook is not applied again even
+        if it arrives before Monzo's reply.
+        """
+        pots = {
+            pot.id: pot for account_pots in self._pots.values() for pot in account_pots
+        }
+
+        async def transfer(move: PotTransfer):
+            pot = pots.get(move.pot_id)
+            if pot is None:
+                raise KeyError(f"Unknown pot {move.pot_id}")
+            self._applied_pot_moves.add(move.pot_id, move.account_delta)
+            try:
+                if move.direction == DIRECTION_DEPOSIT:
+                    await self.deposit_pot(pot, move.amount, move.dedupe_id)
+                else:
+                    await self.withdraw_pot(pot, move.amount, move.dedupe_id)
+            except BaseException:
+                self._applied_pot_moves.discard(move.pot_id, move.account_delta)
+                raise
+            balance = self._balances.get(pot.account_id)
+            if balance is not None:
+                balance.balance += move.account_delta
+
+        results = await asyncio.gather(
+            *(self._async_limited(transfer(move)) for move in transfers),
+            return_exceptions=True,
+        )
+        outcomes = []
+        for move, result in zip(transfers, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning("Failed to %s pot %s: %s", move.direction, move.pot_id, result)
+                outcomes.append(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                outcomes.append(None)
+        return outcomes
+
+    def consume_pot_move(self, pot_id: str, amount: int) -> bool:
+        """Return whether a pot transaction was already applied by a transfer."""
+        return self._applied_pot_moves.consume(pot_id, amount)
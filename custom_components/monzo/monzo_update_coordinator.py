@@ -1,23 +1,48 @@
 """Example integration using DataUpdateCoordinator."""
 
+from collections.abc import Iterable
 from datetime import timedelta
 import logging
 import asyncio
 
-import async_timeout
-
-from .monzo_data import MonzoData
-from homeassistant.helpers.update_coordinator import (
-    DataUpdateCoordinator,
+from .const import (
+    REFRESH_TIERS,
+    TIER_ACCOUNTS,
+    TIER_BALANCES,
+    TIER_INTERVALS,
+    TIER_POTS,
+    TIER_WEBHOOKS,
 )
+from .api.circuit_breaker import CircuitOpenError
+from .api.client import AuthorisationExpiredError, InvalidMonzoAPIResponseError
+from .monzo_base_coordinator import MonzoBaseCoordinator
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from .monzo_data import MonzoData
+from .pot_transfers import DIRECTION_DEPOSIT, DIRECTION_WITHDRAW, PotTransfer
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.util import dt as dt_util
 
+from .api.models.balance import Balance
 from .api.models.pot import Pot
+from .api.models.transaction import Transaction
+from .api.scheduler import RequestPriority
 
 _LOGGER = logging.getLogger(__name__)
 
 sem = asyncio.Semaphore(1)
 
-class MonzoUpdateCoordinator(DataUpdateCoordinator):
+# Seconds to wait after a webhook before reconciling against the API, so a
+# burst of transactions results in a single refresh.
+RECONCILE_COOLDOWN = 30
+
+# A tier is treated as due when it is this close to its interval, so timer
+# jitter doesn't push it back by a whole polling cycle.
+TIER_SLACK = timedelta(minutes=1)
+
+class MonzoUpdateCoordinator(MonzoBaseCoordinator):
     def __init__(self, hass, client: MonzoData):
         """Initialize my coordinator."""
         super().__init__(
@@ -26,9 +51,16 @@ class MonzoUpdateCoordinator(DataUpdateCoordinator):
             # Name of the data. For logging purposes.
             name="Monzo",
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(hours=6),
+            # Each poll only refreshes the tiers that are due.
+            update_interval=min(TIER_INTERVALS.values()),
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=RECONCILE_COOLDOWN, immediate=False
+            ),
         )
         self._monzo_client = client
+        self._refresh_priority = RequestPriority.POLL
+        self._requested_tiers: set[str] = set()
+        self._tier_refreshed = {}
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
@@ -36,28 +68,100 @@ class MonzoUpdateCoordinator(DataUpdateCoordinator):
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
         """
-        # try:
         # Note: asyncio.TimeoutError and aiohttp.ClientError are already
-        # handled by the data update coordinator.
-        async with async_timeout.timeout(10):
-            # Grab active context variables to limit data required to be fetched from API
-            # Note: using context is not required if there is no need or ability to limit
-            # data retrieved from API.
-            listening_idx = set(self.async_contexts())
-            return await self._monzo_client.async_update_coordinated(listening_idx)
-        # except ApiAuthError as err:
-        #     # Raising ConfigEntryAuthFailed will cancel future updates
-        #     # and start a config flow with SOURCE_REAUTH (async_step_reauth)
-        #     raise ConfigEntryAuthFailed from err
-        # except ApiError as err:
-        #     raise UpdateFailed(f"Error communicating with API: {err}")
-
-    async def async_force_update(self):
+        # handled by the data update coordinator. Each request has its own
+        # timeout, so a refresh queued behind the rate limit isn't cut short.
+        self._raise_if_circuit_open(self._monzo_client.breaker)
+        try:
+            async with self._monzo_client.metrics.track_cycle(self.name):
+                # Grab active context variables to limit data required to be fetched from API
+                # Note: using context is not required if there is no need or ability to limit
+                # data retrieved from API.
+                # Fetch everything on the first refresh, entities are created from it.
+                listening_idx = set(self.async_contexts()) if self.data is not None else None
+                priority, self._refresh_priority = self._refresh_priority, RequestPriority.POLL
+                tiers = self._due_tiers()
+                data = await self._monzo_client.async_update_coordinated(listening_idx, tiers, priority)
+                # Requested tiers stay due until a refresh has fetched them,
+                # including any requested while this one was running.
+                self._requested_tiers -= tiers
+                now = dt_util.utcnow()
+                for tier in tiers:
+                    self._tier_refreshed[tier] = now
+                # Only entities whose balance or pot changed need to re-render.
+                self._set_changed(data)
+                return data
+        except AuthorisationExpiredError as err:
+            # Raising ConfigEntryAuthFailed will cancel future updates
+            # and start a config flow with SOURCE_REAUTH (async_step_reauth)
+            raise ConfigEntryAuthFailed from err
+        except (CircuitOpenError, InvalidMonzoAPIResponseError) as err:
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+    def _due_tiers(self) -> set[str]:
+        if self.data is None:
+            return set(REFRESH_TIERS)
+        now = dt_util.utcnow()
+        due = set(self._requested_tiers)
+        for tier, interval in TIER_INTERVALS.items():
+            refreshed = self._tier_refreshed.get(tier)
+            if refreshed is None or now - refreshed >= interval - TIER_SLACK:
+                due.add(tier)
+        return due
+
+    @callback
+    def async_restore(self, data):
+        """Serve restored data until every tier has been refreshed."""
+        self._requested_tiers.update(REFRESH_TIERS)
+        self.async_set_updated_data(data)
+
+    async def async_force_update(self, tiers: Iterable[str] = REFRESH_TIERS):
         if not sem.locked():
             async with sem:
+                self._requested_tiers.update(tiers)
+                if TIER_ACCOUNTS in self._requested_tiers:
+                    self._monzo_client.invalidate_cache("accounts")
+                if TIER_WEBHOOKS in self._requested_tiers:
+                    self._monzo_client.invalidate_cache("webhooks")
                 data = await self._async_update_data()
-                await self.async_set_updated_data(data)
+                self.async_set_updated_data(data)
     
+    async def async_apply_transaction(self, transaction: Transaction):
+        """Apply a new transaction to the cached balances ahead of a refresh."""
+        if self.data is None or transaction.decline_reason is not None:
+            return
+        balance = self.data.get(transaction.account_id)
+        if not isinstance(balance, Balance):
+            return
+        self._requested_tiers.add(TIER_BALANCES)
+        self._refresh_priority = RequestPriority.WEBHOOK
+        if transaction.scheme == 'uk_retail_pot' and self._monzo_client.consume_pot_move(
+            transaction.metadata.pot_id, transaction.amount
+        ):
+            # Our own transfer, already applied when Monzo confirmed it.
+            self._requested_tiers.add(TIER_POTS)
+            await self.async_request_refresh()
+            return
+        changed = {transaction.account_id}
+        balance.balance += transaction.amount
+        if transaction.scheme == 'uk_retail_pot':
+            # Money moved between the account and a pot, the total is unchanged.
+            pot = self.data.get(transaction.metadata.pot_id)
+            if isinstance(pot, Pot):
+                pot.balance -= transaction.amount
+                changed.add(pot.id)
+                self._requested_tiers.add(TIER_POTS)
+        else:
+            balance.total_balance += transaction.amount
+            if transaction.amount < 0:
+                balance.spend_today += transaction.amount
+        self._notify_idx = changed
+        self.async_update_listeners()
+        await self.async_request_refresh()
+
+    async def async_reconcile_webhooks(self, account_ids, url):
+        await self._monzo_client.async_reconcile_webhooks(account_ids, url)
+
     async def register_webhook(self, account_id, url):
         await self._monzo_client.register_webhook(account_id, url)
 
@@ -65,7 +169,29 @@ class MonzoUpdateCoordinator(DataUpdateCoordinator):
         await self._monzo_client.unregister_webhook(webhook_id)
 
     async def deposit_pot(self, pot: Pot, amount: int):
-        return await self._monzo_client.deposit_pot(pot, amount)
+        await self.async_pot_transfers([PotTransfer(pot.id, DIRECTION_DEPOSIT, amount)])
 
     async def withdraw_pot(self, pot: Pot, amount: int):
-        return await self._monzo_client.withdraw_pot(pot, amount)
\ No newline at end of file
+        await self.async_pot_transfers([PotTransfer(pot.id, DIRECTION_WITHDRAW, amount)])
+
+    async def async_pot_transfers(self, transfers: list[PotTransfer]):
+        """Run a plan of pot moves and reconcile once they have all finished."""
+        outcomes = await self._monzo_client.async_pot_transfers(transfers)
+        changed = set()
+        failed = []
+        for move, error in zip(transfers, outcomes):
+            if error is not None:
+                failed.append(f"{move.direction} {move.amount} {move.pot_id}: {error}")
+                continue
+            changed.add(move.pot_id)
+            pot = self.data.get(move.pot_id)
+            if isinstance(pot, Pot):
+                changed.add(pot.account_id)
+        if changed:
+            self._notify_idx = changed
+            self.async_update_listeners()
+            self._requested_tiers.update((TIER_BALANCES, TIER_POTS))
+            self._refresh_priority = RequestPriority.WRITE
+            await self.async_request_refresh()
+        if failed:
+            raise HomeAssistantError(f"Failed pot transfers: {'; '.join(failed)}")
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""Plans of moves between accounts and their pots."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+from time import monotonic
+
+DIRECTION_DEPOSIT = "deposit"
+DIRECTION_WITHDRAW = "withdraw"
+DIRECTIONS = (DIRECTION_DEPOSIT, DIRECTION_WITHDRAW)
+
+# Seconds an applied move waits for its webhook before it is forgotten.
+APPLIED_MOVE_TTL = 600
+
+
+@dataclass(frozen=True)
+class PotTransfer:
+    """A single move of money into or out of a pot."""
+
+    pot_id: str
+    direction: str
+    amount: int
+    # None lets the client pick a random one, so the move is never deduplicated.
+    dedupe_id: str | None = None
+
+    @property
+    def account_delta(self) -> int:
+        """Return the change to the pot's account balance, in minor units."""
+        return -self.amount if self.direction == DIRECTION_DEPOSIT else self.amount
+
+
+def dedupe_id(key: str, pot_id: str, direction: str, amount: int, index: int) -> str:
+    """Return a dedupe id that is the same every time a plan is retried."""
+    digest = hashlib.sha256(f"{key}:{pot_id}:{direction}:{amount}:{index}".encode())
+    return digest.hexdigest()[:32]
+
+
+def plan_transfers(key: str, moves: list[tuple[str, str, int]]) -> list[PotTransfer]:
+    """Build the transfers for a plan of ``(pot_id, direction, amount)`` moves.
+
+    Running the same plan under the same key again reuses the dedupe ids, so
+    Monzo ignores the moves that already went through.
+    """
+    return [
+        PotTransfer(pot_id, direction, amount, dedupe_id(key, pot_id, direction, amount, index))
+        for index, (pot_id, direction, amount) in enumerate(moves)
+    ]
+
+
+class AppliedPotMoves:
+    """Pot moves already applied to local state, awaiting their webhook.
+
+    Monzo sends a ``uk_retail_pot`` transaction for every move, which would
+    otherwise be applied a second time. Moves are matched on the pot and the
+    change to the account balance, which is the webhook's amount.
+    """
+
+    def __init__(self, ttl: float = APPLIED_MOVE_TTL) -> None:
+        """Initialise the tracker."""
+        self._ttl = ttl
+        self._moves: dict[tuple[str, int], list[float]] = {}
+
+    def add(self, pot_id: str, account_delta: int) -> None:
+        """Record a move whose webhook should be skipped."""
+        self._expire()
+        self._moves.setdefault((pot_id, account_delta), []).append(monotonic() + self._ttl)
+
+    def discard(self, pot_id: str, account_delta: int) -> None:
+        """Forget a recorded move, for one that failed."""
+        self._take((pot_id, account_delta))
+
+    def consume(self, pot_id: str, amount: int) -> bool:
+        """Return whether a webhook matches a recorded move, forgetting it."""
+        self._expire()
+        return self._take((pot_id, amount))
+
+    def _take(self, key: tuple[str, int]) -> bool:
+        expiries = self._moves.get(key)
+        if not expiries:
+            return False
+        expiries.pop(0)
+        if not expiries:
+            del self._moves[key]
+        return True
+
+    def _expire(self) -> None:
+        now = monotonic()
+        for key in list(self._moves):
+            expiries = [expiry for expiry in self._moves[key] if expiry > now]
+            if expiries:
+                self._moves[key] = expiries
+            else:
+                del self._moves[key]
@@ -10,13 +10,15 @@ from datetime import datetime
 
 from homeassistant.components.sensor import SensorEntity, SensorStateClass, SensorDeviceClass, SensorEntityDescription
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import ATTR_ATTRIBUTION
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_ATTRIBUTION, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.typing import StateType
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.update_coordinator import (
+    CoordinatorEntity,
     DataUpdateCoordinator,
 )
 from homeassistant.util import dt as dt_util
@@ -25,8 +27,17 @@ from .const import (
     SERVICE_POT_DEPOSIT,
     SERVICE_POT_WITHDRAW
 )
+from .spend_windows import (
+    WINDOW_PERIOD,
+    WINDOW_PREVIOUS_PERIOD,
+    WINDOW_ROLLING,
+    WINDOW_TODAY,
+    WINDOW_WEEK,
+    week_start,
+)
 
 from .api.models.balance import Balance
+from .monzo_data import MonzoData
 from .monzo_update_coordinator import MonzoUpdateCoordinator
 from .monzo_category_update_coordinator import Category, MonzoCategoryUpdateCoordinator
 from .entity import MonzoBaseEntity
@@ -49,6 +60,10 @@ class MonzoSensorEntityDescription(SensorEntityDescription):
 
     value_fn: Callable[[dict[str, Any]], StateType]
     resets_daily: bool
+    # Start of the current cycle, for totals that reset on another schedule.
+    last_reset_fn: Callable[[datetime], datetime] | None = None
+    # Spend window the per-account attributes of category sensors are taken from.
+    window: str = WINDOW_PERIOD
 
 ACCOUNT_SENSORS = (
     MonzoSensorEntityDescription(
@@ -111,6 +126,154 @@ CATEGORY_SENSORS = (
         native_unit_of_measurement="GBP",
         suggested_display_precision=2,
     ),
+    MonzoSensorEntityDescription(
+        key="category_spend_today",
+        translation_key="category_spend_today",
+        value_fn=lambda data: abs(data.windows[WINDOW_TODAY].amount / 100),
+        resets_daily=True,
+        window=WINDOW_TODAY,
+        device_class=SensorDeviceClass.MONETARY,
+        native_unit_of_measurement="GBP",
+        suggested_display_precision=2,
+        entity_registry_enabled_default=False,
+    ),
+    MonzoSensorEntityDescription(
+        key="category_spend_week",
+        translation_key="category_spend_week",
+        value_fn=lambda data: abs(data.windows[WINDOW_WEEK].amount / 100),
+        resets_daily=False,
+        last_reset_fn=week_start,
+        window=WINDOW_WEEK,
+        device_class=SensorDeviceClass.MONETARY,
+        native_unit_of_measurement="GBP",
+        suggested_display_precision=2,
+        entity_registry_enabled_default=False,
+    ),
+    MonzoSensorEntityDescription(
+        key="category_spend_previous_period",
+        translation_key="category_spend_previous_period",
+        value_fn=lambda data: abs(data.windows[WINDOW_PREVIOUS_PERIOD].amount / 100),
+        resets_daily=False,
+        window=WINDOW_PREVIOUS_PERIOD,
+        # A finished period, not a running total.
+        state_class=SensorStateClass.MEASUREMENT,
+        device_class=SensorDeviceClass.MONETARY,
+        native_unit_of_measurement="GBP",
+        suggested_display_precision=2,
+        entity_registry_enabled_default=False,
+    ),
+    MonzoSensorEntityDescription(
+        key="category_spend_rolling",
+        translation_key="category_spend_rolling",
+        value_fn=lambda data: abs(data.windows[WINDOW_ROLLING].amount / 100),
+        resets_daily=False,
+        window=WINDOW_ROLLING,
+        # Falls as old transactions leave the window, so it isn't a total.
+        state_class=SensorStateClass.MEASUREMENT,
+        device_class=SensorDeviceClass.MONETARY,
+        native_unit_of_measurement="GBP",
+        suggested_display_precision=2,
+        entity_registry_enabled_default=False,
+    ),
+)
+
+@dataclass(frozen=True, kw_only=True)
+class MonzoDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes Monzo diagnostic sensor entity."""
+
+    value_fn: Callable[[MonzoData], StateType]
+    attributes_fn: Callable[[MonzoData], dict[str, Any]] | None = None
+    category_coordinator: bool = False
+    entity_category: EntityCategory = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+DIAGNOSTIC_SENSORS = (
+    MonzoDiagnosticSensorEntityDescription(
+        key="api_requests",
+        translation_key="api_requests",
+        value_fn=lambda client: client.metrics.requests,
+        attributes_fn=lambda client: {
+            name: endpoint.requests for name, endpoint in client.metrics.endpoints.items()
+        },
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="api_errors",
+        translation_key="api_errors",
+        value_fn=lambda client: client.metrics.errors,
+        attributes_fn=lambda client: {
+            f"{name} {code}": count
+            for name, endpoint in client.metrics.endpoints.items()
+            for code, count in endpoint.error_codes.items()
+        },
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="api_throttled",
+        translation_key="api_throttled",
+        value_fn=lambda client: client.request_stats.throttled,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="api_latency",
+        translation_key="api_latency",
+        value_fn=lambda client: round(
+            sum(endpoint.latency_total for endpoint in client.metrics.endpoints.values())
+            / max(client.metrics.requests, 1) * 1000,
+            1,
+        ),
+        attributes_fn=lambda client: {
+            name: round(endpoint.latency_average * 1000, 1)
+            for name, endpoint in client.metrics.endpoints.items()
+        },
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="api_queue_wait",
+        translation_key="api_queue_wait",
+        value_fn=lambda client: round(client.request_stats.average_wait * 1000, 1),
+        attributes_fn=lambda client: {
+            'max_wait_ms': round(client.request_stats.max_wait * 1000, 1),
+            'queue_depth': client.request_stats.queue_depth,
+        },
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="api_decode_time",
+        translation_key="api_decode_time",
+        value_fn=lambda client: round(client.metrics.decode_time_total * 1000, 1),
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="refresh_duration",
+        translation_key="refresh_duration",
+        value_fn=lambda client: round(client.metrics.cycles["Monzo"].last_duration, 2),
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="category_refresh_duration",
+        translation_key="category_refresh_duration",
+        value_fn=lambda client: round(client.metrics.cycles["Monzo Transactions"].last_duration, 2),
+        category_coordinator=True,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    MonzoDiagnosticSensorEntityDescription(
+        key="category_refresh_pages",
+        translation_key="category_refresh_pages",
+        value_fn=lambda client: client.metrics.cycles["Monzo Transactions"].last_pages,
+        category_coordinator=True,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
 )
 
 async def async_setup_entry(
@@ -121,8 +284,7 @@ async def async_setup_entry(
     """Set up Monzo sensor platform."""
     coordinator: MonzoUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
     category_coordinator: MonzoCategoryUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]["category_coordinator"]
-
-    await coordinator.async_config_entry_first_refresh()
+    client: MonzoData = hass.data[DOMAIN][config_entry.entry_id]["client"]
 
     # async_add_entities(
     #     BalanceSensor(coordinator, idx) for idx, ent in coordinator.data.items() if not idx.startswith("webhook")
@@ -154,7 +316,17 @@ async def async_setup_entry(
     #     SpendTodaySensor(coordinator, idx) for idx, ent in coordinator.data.items() if idx.startswith("acc")
     # )
 
-    async_add_entities(accounts + pots + categories) 
+    diagnostics = [
+        MonzoDiagnosticSensor(
+            category_coordinator if entity_description.category_coordinator else coordinator,
+            client,
+            entity_description,
+            config_entry.entry_id,
+        )
+        for entity_description in DIAGNOSTIC_SENSORS
+    ]
+
+    async_add_entities(accounts + pots + categories + diagnostics)
     
     platform = entity_platform.async_get_current_platform()
 
@@ -183,11 +355,18 @@ class MonzoSensor(MonzoBaseEntity, SensorEntity):
         """Initialize the sensor."""
         super().__init__(coordinator, idx, device_model)
 
-        self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_state_class = entity_description.state_class or SensorStateClass.TOTAL
 
         self.entity_description = entity_description
 
         self._attr_unique_id = f"{self.idx}_{self.entity_description.key}"
+        self._attributes: dict[str, Any] | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Drop the cached attributes, the coordinator only calls this when the data changed."""
+        self._attributes = None
+        super()._handle_coordinator_update()
 
     @property
     def native_value(self) -> StateType:
@@ -203,6 +382,11 @@ class MonzoSensor(MonzoBaseEntity, SensorEntity):
     @property
     def extra_state_attributes(self):
         """Return the state attributes of the sensor."""
+        if self._attributes is None:
+            self._attributes = self._build_attributes()
+        return self._attributes
+
+    def _build_attributes(self) -> dict[str, Any]:
         if isinstance(self.data, Balance):
             return {
                 ATTR_ATTRIBUTION: ATTRIBUTION,
@@ -211,6 +395,10 @@ class MonzoSensor(MonzoBaseEntity, SensorEntity):
             return {
                 ATTR_ATTRIBUTION: ATTRIBUTION,
                 'target': self.data.target,
+                'accounts': {
+                    name: abs(amount / 100)
+                    for name, amount in self.data.windows[self.entity_description.window].accounts.items()
+                },
             }
         return {
             ATTR_ATTRIBUTION: ATTRIBUTION,
@@ -226,6 +414,8 @@ class MonzoSensor(MonzoBaseEntity, SensorEntity):
         """These values reset every day."""
         if self.entity_description.resets_daily:
             return dt_util.start_of_local_day()
+        if self.entity_description.last_reset_fn is not None:
+            return self.entity_description.last_reset_fn(dt_util.utcnow())
         return None
 
     async def pot_deposit(self, amount_in_minor_units: int | None = None):
@@ -236,4 +426,42 @@ class MonzoSensor(MonzoBaseEntity, SensorEntity):
     async def pot_withdraw(self, amount_in_minor_units: int | None = None):
         if not self.idx.startswith("pot"):
             raise HomeAssistantError("supported only on Pot sensors")
-        await self.coordinator.withdraw_pot(self.data, amount_in_minor_units)
\ No newline at end of file
+        await self.coordinator.withdraw_pot(self.data, amount_in_minor_units)
+
+class MonzoDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Representation of a Monzo API diagnostic sensor."""
+
+    _attr_attribution = ATTRIBUTION
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        client: MonzoData,
+        entity_description: MonzoDiagnosticSensorEntityDescription,
+        entry_id: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._client = client
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{entry_id}_{entity_description.key}"
+        self._attr_device_info = DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            identifiers={(DOMAIN, f"{entry_id}_api")},
+            manufacturer="Monzo",
+            model="API",
+            name="Monzo API",
+        )
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state."""
+        return self.entity_description.value_fn(self._client)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes of the sensor."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self._client)
@@ -1,22 +1,88 @@
 import voluptuous as vol
 
-from .const import DOMAIN, SERVICE_UPDATE, SERVICE_CATEGORY_UPDATE
+from .const import (
+    DOMAIN,
+    REFRESH_TIERS,
+    SERVICE_CATEGORY_UPDATE,
+    SERVICE_POT_TRANSFERS,
+    SERVICE_UPDATE,
+)
 from .monzo_update_coordinator import MonzoUpdateCoordinator
 from .monzo_category_update_coordinator import MonzoCategoryUpdateCoordinator
+from .pot_transfers import DIRECTIONS, plan_transfers
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+import homeassistant.helpers.config_validation as cv
+
+ATTR_TIERS = "tiers"
+ATTR_KEY = "key"
+ATTR_TRANSFERS = "transfers"
+ATTR_POT = "pot"
+ATTR_DIRECTION = "direction"
+ATTR_AMOUNT = "amount_in_minor_units"
+
+MAX_TRANSFERS = 50
 
 SERVICE_UPDATE_SCHEMA = vol.Schema(
     {
+        vol.Optional(ATTR_TIERS, default=list(REFRESH_TIERS)): vol.All(
+            cv.ensure_list, [vol.In(REFRESH_TIERS)]
+        ),
+    }
+)
+
+SERVICE_CATEGORY_UPDATE_SCHEMA = vol.Schema(
+    {
+    }
+)
+
+SERVICE_POT_TRANSFERS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_KEY): cv.string,
+        vol.Required(ATTR_TRANSFERS): vol.All(
+            cv.ensure_list,
+            vol.Length(min=1, max=MAX_TRANSFERS),
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_POT): cv.string,
+                        vol.Required(ATTR_DIRECTION): vol.In(DIRECTIONS),
+                        vol.Required(ATTR_AMOUNT): vol.All(vol.Coerce(int), vol.Range(1, 200000)),
+                    }
+                )
+            ],
+        ),
     }
 )
 
+def _resolve_pot_id(hass: HomeAssistant, pot: str) -> str:
+    """Accept either a pot id or the entity id of one of its sensors."""
+    if not pot.startswith("sensor."):
+        return pot
+    entry = er.async_get(hass).async_get(pot)
+    if entry is None or entry.platform != DOMAIN or not entry.unique_id.startswith("pot"):
+        raise HomeAssistantError(f"{pot} is not a Monzo pot sensor")
+    return entry.unique_id.rsplit("_pot_balance", 1)[0]
+
 def setup_services(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Set up the services for the Monzo integration."""
 
-    async def update(_call):
+    async def update(call):
         coordinator: MonzoUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-        await coordinator.async_force_update()
+        await coordinator.async_force_update(call.data[ATTR_TIERS])
+
+    async def pot_transfers(call):
+        coordinator: MonzoUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        moves = [
+            (_resolve_pot_id(hass, move[ATTR_POT]), move[ATTR_DIRECTION], move[ATTR_AMOUNT])
+            for move in call.data[ATTR_TRANSFERS]
+        ]
+        unknown = [pot_id for pot_id, _, _ in moves if pot_id not in coordinator.data]
+        if unknown:
+            raise HomeAssistantError(f"Unknown Monzo pots: {', '.join(unknown)}")
+        await coordinator.async_pot_transfers(plan_transfers(call.data[ATTR_KEY], moves))
 
     async def category_update(_call):
         coordinator: MonzoCategoryUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]["category_coordinator"]
@@ -33,5 +99,12 @@ def setup_services(hass: HomeAssistant, entry: ConfigEntry) -> None:
         DOMAIN,
         SERVICE_CATEGORY_UPDATE,
         category_update,
-        schema=SERVICE_UPDATE_SCHEMA,
+        schema=SERVICE_CATEGORY_UPDATE_SCHEMA,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_POT_TRANSFERS,
+        pot_transfers,
+        schema=SERVICE_POT_TRANSFERS_SCHEMA,
     )
\ No newline at end of file
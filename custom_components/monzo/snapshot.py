@@ -0,0 +1,86 @@
+"""Snapshot of the last good Monzo data, for starting without the API."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SNAPSHOT_STORAGE_VERSION
+from .monzo_category_update_coordinator import MonzoCategoryUpdateCoordinator
+from .monzo_data import MonzoData
+from .monzo_update_coordinator import MonzoUpdateCoordinator
+
+SAVE_DELAY = 30
+
+
+class _SnapshotStorage(Store):
+    """Store discarding snapshots written with another layout."""
+
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        # A snapshot is only a head start, refetching is cheaper than migrating.
+        return None
+
+
+class MonzoSnapshotStore:
+    """Accounts, balances, pots, webhooks and the aggregated accounts.
+
+    Category totals aren't stored, they are rebuilt from the transaction
+    store, which is already persisted.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialise the store."""
+        self._store = _SnapshotStorage(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+        self._client: MonzoData | None = None
+        self._category_coordinator: MonzoCategoryUpdateCoordinator | None = None
+
+    async def async_load(self) -> dict[str, Any] | None:
+        """Return the saved snapshot, if there is a usable one."""
+        return await self._store.async_load()
+
+    @callback
+    def async_restore(
+        self,
+        snapshot: dict[str, Any],
+        client: MonzoData,
+        coordinator: MonzoUpdateCoordinator,
+        category_coordinator: MonzoCategoryUpdateCoordinator,
+    ) -> None:
+        """Populate both coordinators from a snapshot."""
+        coordinator.async_restore(client.restore(snapshot["data"]))
+        category_coordinator.async_restore(snapshot["category_accounts"], snapshot["account_names"])
+
+    @callback
+    def async_track(
+        self,
+        client: MonzoData,
+        coordinator: MonzoUpdateCoordinator,
+        category_coordinator: MonzoCategoryUpdateCoordinator,
+    ) -> CALLBACK_TYPE:
+        """Save a new snapshot after each successful refresh."""
+        self._client = client
+        self._category_coordinator = category_coordinator
+
+        @callback
+        def schedule_save() -> None:
+            if coordinator.last_update_success and category_coordinator.last_update_success:
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        unsubscribes = [
+            coordinator.async_add_listener(schedule_save),
+            category_coordinator.async_add_listener(schedule_save),
+        ]
+
+        def unsubscribe() -> None:
+            for unsub in unsubscribes:
+                unsub()
+
+        return unsubscribe
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "data": self._client.snapshot(),
+            "category_accounts": self._category_coordinator.account_ids,
+            "account_names": self._category_coordinator.account_names,
+        }
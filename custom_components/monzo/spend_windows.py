@@ -0,0 +1,136 @@
+"""Spend totals over several time windows, computed in one pass."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+
+from homeassistant.util import dt as dt_util
+
+BUDGET_PERIOD_DAY = 28
+
+WINDOW_TODAY = "today"
+WINDOW_WEEK = "week"
+WINDOW_PERIOD = "period"
+WINDOW_PREVIOUS_PERIOD = "previous_period"
+ROLLING_DAYS = 30
+WINDOW_ROLLING = f"rolling_{ROLLING_DAYS}"
+
+
+def budget_period_start(today: date) -> datetime:
+    """Return the start of the budget period containing the given day."""
+    start = today.replace(day=BUDGET_PERIOD_DAY)
+    if today < start:
+        start = (start.replace(day=1) - timedelta(days=1)).replace(day=BUDGET_PERIOD_DAY)
+    return datetime.combine(start, time.min, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class SpendWindow:
+    """A named time range transactions are totalled over."""
+
+    key: str
+    bounds_fn: Callable[[datetime], tuple[datetime, datetime | None]]
+
+    def bounds(self, now: datetime) -> tuple[float, float]:
+        """Return the window as a half-open range of timestamps."""
+        start, end = self.bounds_fn(now)
+        return start.timestamp(), end.timestamp() if end is not None else float("inf")
+
+
+def _today(now: datetime) -> tuple[datetime, None]:
+    return dt_util.start_of_local_day(now), None
+
+
+def week_start(now: datetime) -> datetime:
+    """Return the start of the local week, on Monday, containing ``now``."""
+    today = dt_util.as_local(now).date()
+    return dt_util.start_of_local_day(today - timedelta(days=today.weekday()))
+
+
+def _week(now: datetime) -> tuple[datetime, None]:
+    return week_start(now), None
+
+
+def _period(now: datetime) -> tuple[datetime, None]:
+    return budget_period_start(dt_util.as_local(now).date()), None
+
+
+def _previous_period(now: datetime) -> tuple[datetime, datetime]:
+    start = budget_period_start(dt_util.as_local(now).date())
+    return budget_period_start((start - timedelta(days=1)).date()), start
+
+
+def _rolling(now: datetime) -> tuple[datetime, None]:
+    return now - timedelta(days=ROLLING_DAYS), None
+
+
+SPEND_WINDOWS = (
+    SpendWindow(WINDOW_TODAY, _today),
+    SpendWindow(WINDOW_WEEK, _week),
+    SpendWindow(WINDOW_PERIOD, _period),
+    SpendWindow(WINDOW_PREVIOUS_PERIOD, _previous_period),
+    SpendWindow(WINDOW_ROLLING, _rolling),
+)
+
+
+class SpendTotals:
+    """Total spend in a window, and its split between accounts."""
+
+    def __init__(self):
+        self.amount = 0
+        self.accounts: dict[str, int] = {}
+
+    def add(self, account_name: str, amount: int) -> None:
+        self.amount += amount
+        self.accounts[account_name] = self.accounts.get(account_name, 0) + amount
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SpendTotals):
+            return NotImplemented
+        return self.amount == other.amount and self.accounts == other.accounts
+
+
+class SpendAggregator:
+    """Buckets transaction records into every window at once.
+
+    Window bounds are fixed when the aggregator is created, so totals built
+    by a refresh and deltas applied from webhooks agree on the boundaries.
+    """
+
+    def __init__(self, now: datetime, windows: Iterable[SpendWindow] = SPEND_WINDOWS):
+        self.now = now
+        self._bounds = [(window.key, *window.bounds(now)) for window in windows]
+
+    @property
+    def retention_start(self) -> datetime:
+        """Return the oldest time any window needs transactions from."""
+        return dt_util.utc_from_timestamp(min(start for _, start, _ in self._bounds))
+
+    @property
+    def current_start(self) -> datetime:
+        """Return the oldest time a window that is still open needs transactions from."""
+        return dt_util.utc_from_timestamp(
+            min(start for _, start, end in self._bounds if end == float("inf"))
+        )
+
+    def windows_for(self, created: float) -> list[str]:
+        """Return the keys of the windows containing the given timestamp."""
+        return [key for key, start, end in self._bounds if start <= created < end]
+
+    def new_totals(self) -> dict[str, SpendTotals]:
+        """Return empty totals for every window."""
+        return {key: SpendTotals() for key, _, _ in self._bounds}
+
+    def add(
+        self,
+        totals: dict[str, dict[str, SpendTotals]],
+        account_name: str,
+        created: float,
+        amounts: dict[str, int],
+        sign: int = 1,
+    ) -> None:
+        """Add per-key amounts created at the given time to every window."""
+        for window in self.windows_for(created):
+            for key, amount in amounts.items():
+                totals[key][window].add(account_name, sign * amount)
@@ -0,0 +1,223 @@
+"""Import Monzo transaction history into Home Assistant long-term statistics."""
+from __future__ import annotations
+
+from collections import defaultdict
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api.client import InsufficientPermissionsError
+from .api.scheduler import RequestPriority
+from .api.models.transaction import TransactionSummary
+from .const import DOMAIN, STATISTICS_STORAGE_VERSION
+from .monzo_category_update_coordinator import CATEGORY_LIST
+from .monzo_data import MonzoData
+
+_LOGGER = logging.getLogger(__name__)
+
+# Earliest point the backfill asks for, Monzo accounts can't predate it.
+BACKFILL_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+# Outside the few minutes after authorising, Monzo only serves this much
+# history, so a refused backfill starts again from here.
+RECENT_HISTORY = timedelta(days=89)
+# Hourly rows buffered before they are handed to the recorder.
+BATCH_SIZE = 5000
+UPDATE_INTERVAL = timedelta(hours=1)
+HOUR = 3600
+
+
+def _hour_start(timestamp: float) -> float:
+    return timestamp - timestamp % HOUR
+
+
+class MonzoStatisticsImporter:
+    """Hourly balance and category spend per account, as external statistics.
+
+    Each account has a checkpoint holding the end of the last hour written
+    and the running sums at that point. The first run pages through the full
+    history from there, later runs only pick up the hours since. Only
+    complete hours are written, so a partly seen hour is fetched again.
+
+    The balance is the running sum of the account's transactions. A full
+    history starts from an empty account. When Monzo refuses older history
+    the sum is anchored to today's balance instead, less the flow since.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: MonzoData, entry_id: str) -> None:
+        """Initialise the importer."""
+        self._hass = hass
+        self._client = client
+        self._store = Store(hass, STATISTICS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.statistics")
+        self._accounts: dict[str, dict[str, Any]] = {}
+        self._account_names: dict[str, str] = {}
+        self._statistic_names: dict[str, str] = {}
+        self._unsub_update: CALLBACK_TYPE | None = None
+
+    async def async_run(self, account_names: dict[str, str]) -> None:
+        """Backfill every account, then keep the statistics current."""
+        self._account_names = account_names
+        data = await self._store.async_load()
+        if data is not None:
+            self._accounts = data["accounts"]
+        await self.async_update()
+        self._unsub_update = async_track_time_interval(
+            self._hass, self._async_scheduled_update, UPDATE_INTERVAL
+        )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the periodic updates."""
+        if self._unsub_update is not None:
+            self._unsub_update()
+            self._unsub_update = None
+
+    async def _async_scheduled_update(self, _now) -> None:
+        await self.async_update()
+
+    async def async_update(self) -> None:
+        """Import the complete hours since each account's checkpoint."""
+        for account_id in self._account_names:
+            try:
+                try:
+                    await self._async_import_account(account_id)
+                except InsufficientPermissionsError:
+                    recent = (dt_util.utcnow() - RECENT_HISTORY).timestamp()
+                    checkpoint = self._accounts[account_id]
+                    if checkpoint["cursor"] is not None and checkpoint["cursor"] >= recent:
+                        raise
+                    # Hours older than Monzo will serve are skipped.
+                    checkpoint["cursor"] = recent
+                    await self._async_import_account(account_id, anchor=True)
+            except Exception as err:  # pylint: disable=broad-except
+                # The checkpoint only moves past written hours, the next
+                # run resumes from there.
+                _LOGGER.warning("Failed to import Monzo statistics for %s: %s", account_id, err)
+
+    async def _async_import_account(self, account_id: str, anchor: bool = False) -> None:
+        """Import the complete hours since the account's checkpoint.
+
+        With ``anchor`` the balance is shifted to end at today's balance, and
+        every row is held until then rather than written in batches. That is
+        only used for the recent history Monzo still serves.
+        """
+        checkpoint = self._accounts.setdefault(account_id, {"cursor": None, "sums": {}})
+        since = (
+            dt_util.utc_from_timestamp(checkpoint["cursor"])
+            if checkpoint["cursor"] is not None
+            else BACKFILL_START
+        )
+        current_hour = _hour_start(dt_util.utcnow().timestamp())
+        balance_id = self._balance_statistic_id(account_id)
+        sums: defaultdict[str, float] = defaultdict(float, checkpoint["sums"])
+        # Amounts of the hour being read, keyed by statistic id.
+        hour: float | None = None
+        hour_amounts: defaultdict[str, float] = defaultdict(float)
+        rows: defaultdict[str, list[StatisticData]] = defaultdict(list)
+        row_count = 0
+        # Flow of the current hour, which today's balance already includes.
+        current_flow = 0.0
+
+        def flush_hour() -> None:
+            nonlocal row_count
+            start = dt_util.utc_from_timestamp(hour)
+            for statistic_id, amount in hour_amounts.items():
+                sums[statistic_id] += amount
+                rows[statistic_id].append(
+                    StatisticData(start=start, state=sums[statistic_id], sum=sums[statistic_id])
+                )
+                row_count += 1
+            hour_amounts.clear()
+
+        # Backfills cover years of history, decode pages as they download.
+        transactions = self._client.async_get_transactions(
+            account_id, since, summary=True, stream=True, priority=RequestPriority.BACKGROUND
+        )
+        async with aclosing(transactions):
+            async for transaction in transactions:
+                created = dt_util.parse_datetime(transaction.created).timestamp()
+                transaction_hour = _hour_start(created)
+                if transaction_hour >= current_hour:
+                    if not anchor:
+                        break
+                    if transaction.decline_reason is None:
+                        current_flow += transaction.amount / 100
+                    continue
+                if hour is not None and transaction_hour != hour:
+                    flush_hour()
+                    if row_count >= BATCH_SIZE and not anchor:
+                        await self._async_write(account_id, rows, sums, hour + HOUR)
+                        rows.clear()
+                        row_count = 0
+                hour = transaction_hour
+                for statistic_id, amount in self._amounts(account_id, transaction).items():
+                    hour_amounts[statistic_id] += amount
+
+        if hour is not None:
+            flush_hour()
+        if anchor:
+            balance = await self._client.async_update_balance_for_account(
+                account_id, RequestPriority.BACKGROUND
+            )
+            shift = balance.balance / 100 - current_flow - sums[balance_id]
+            sums[balance_id] += shift
+            for row in rows.get(balance_id, ()):
+                row["state"] += shift
+                row["sum"] += shift
+        # Every hour before the current one has been seen, even when none of
+        # them had a transaction, so a quiet account's checkpoint keeps up.
+        await self._async_write(account_id, rows, sums, current_hour)
+
+    @staticmethod
+    def _balance_statistic_id(account_id: str) -> str:
+        return f"{DOMAIN}:{account_id.lower()}_balance"
+
+    def _amounts(self, account_id: str, transaction: TransactionSummary) -> dict[str, float]:
+        """Return what a transaction adds to each of the account's statistics."""
+        if transaction.decline_reason is not None:
+            return {}
+        prefix = f"{DOMAIN}:{account_id.lower()}"
+        account_name = self._account_names[account_id]
+        statistic_id = self._balance_statistic_id(account_id)
+        self._statistic_names[statistic_id] = f"{account_name} Balance"
+        amounts = {statistic_id: transaction.amount / 100}
+        for category, amount in (transaction.categories or {}).items():
+            statistic_id = f"{prefix}_spend_{category.lower()}"
+            category_name = CATEGORY_LIST.get(category, (category.replace("_", " ").title(),))[0]
+            self._statistic_names[statistic_id] = f"{account_name} {category_name} Spend"
+            # Spend is positive, refunds reduce it.
+            amounts[statistic_id] = -amount / 100
+        return amounts
+
+    async def _async_write(
+        self,
+        account_id: str,
+        rows: dict[str, list[StatisticData]],
+        sums: dict[str, float],
+        cursor: float,
+    ) -> None:
+        """Hand a batch of rows to the recorder and move the checkpoint."""
+        for statistic_id, statistics in rows.items():
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=self._statistic_names[statistic_id],
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement="GBP",
+            )
+            async_add_external_statistics(self._hass, metadata, statistics)
+        checkpoint = self._accounts[account_id]
+        checkpoint["cursor"] = cursor
+        checkpoint["sums"] = dict(sums)
+        await self._store.async_save({"accounts": self._accounts})
+        _LOGGER.debug(
+            "Imported Monzo statistics for %s up to %s", account_id, dt_util.utc_from_timestamp(cursor)
+        )
@@ -0,0 +1,317 @@
+"""Persistent local store of Monzo transactions."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api.models.transaction import TransactionSummary
+from .const import DOMAIN, TRANSACTION_STORAGE_VERSION, TRANSACTION_SYNC_OVERLAP
+
+SAVE_DELAY = 10
+
+# Split rows of replaced transactions point here until the next compaction.
+DEAD_ROW = -1
+
+
+class _TransactionStorage(Store):
+    """Store migrating the per-record layout to the columnar one."""
+
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        if old_major_version == 1:
+            columns = TransactionColumns()
+            cursors = {}
+            for account_id, account in old_data["accounts"].items():
+                cursors[account_id] = account["cursor"]
+                for transaction_id, record in account["transactions"].items():
+                    columns.upsert(
+                        account_id,
+                        transaction_id,
+                        record["created"],
+                        record["amount"],
+                        record["declined"],
+                        record["categories"],
+                    )
+            return {"cursors": cursors, **columns.as_dict()}
+        return old_data
+
+
+class TransactionColumns:
+    """Transactions held column by column.
+
+    Each transaction is a row in the id, account, created, amount and
+    declined columns. Its category splits are rows in the split columns,
+    pointing back at the transaction row. Account and category ids are
+    interned, so every row only stores small integers.
+
+    A row's live splits are always written together, so each row also keeps
+    where they start and how many there are. That index is not persisted.
+    """
+
+    def __init__(self) -> None:
+        self.accounts: list[str] = []
+        self.categories: list[str] = []
+        self._account_index: dict[str, int] = {}
+        self._category_index: dict[str, int] = {}
+        self.ids: list[str] = []
+        self._row_index: dict[str, int] = {}
+        self.account = array("l")
+        self.created = array("d")
+        self.amount = array("q")
+        self.declined = array("b")
+        self.split_row = array("l")
+        self.split_category = array("l")
+        self.split_amount = array("q")
+        self._split_start = array("l")
+        self._split_count = array("l")
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TransactionColumns:
+        columns = cls()
+        columns.accounts = data["accounts"]
+        columns.categories = data["categories"]
+        columns._account_index = {value: index for index, value in enumerate(columns.accounts)}
+        columns._category_index = {value: index for index, value in enumerate(columns.categories)}
+        columns.ids = data["ids"]
+        columns._row_index = {value: index for index, value in enumerate(columns.ids)}
+        columns.account = array("l", data["account"])
+        columns.created = array("d", data["created"])
+        columns.amount = array("q", data["amount"])
+        columns.declined = array("b", data["declined"])
+        columns.split_row = array("l", data["split_row"])
+        columns.split_category = array("l", data["split_category"])
+        columns.split_amount = array("q", data["split_amount"])
+        columns._index_splits()
+        return columns
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "accounts": self.accounts,
+            "categories": self.categories,
+            "ids": self.ids,
+            "account": self.account.tolist(),
+            "created": self.created.tolist(),
+            "amount": self.amount.tolist(),
+            "declined": self.declined.tolist(),
+            "split_row": self.split_row.tolist(),
+            "split_category": self.split_category.tolist(),
+            "split_amount": self.split_amount.tolist(),
+        }
+
+    def _intern_account(self, account_id: str) -> int:
+        index = self._account_index.get(account_id)
+        if index is None:
+            index = self._account_index[account_id] = len(self.accounts)
+            self.accounts.append(account_id)
+        return index
+
+    def _intern_category(self, category: str) -> int:
+        index = self._category_index.get(category)
+        if index is None:
+            index = self._category_index[category] = len(self.categories)
+            self.categories.append(category)
+        return index
+
+    def row(self, transaction_id: str) -> int | None:
+        return self._row_index.get(transaction_id)
+
+    def upsert(
+        self,
+        account_id: str,
+        transaction_id: str,
+        created: float,
+        amount: int,
+        declined: bool,
+        categories: dict[str, int],
+    ) -> None:
+        """Insert or replace a transaction row and its splits."""
+        row = self._row_index.get(transaction_id)
+        if row is None:
+            row = self._row_index[transaction_id] = len(self.ids)
+            self.ids.append(transaction_id)
+            self.account.append(self._intern_account(account_id))
+            self.created.append(created)
+            self.amount.append(amount)
+            self.declined.append(declined)
+            self._split_start.append(len(self.split_row))
+            self._split_count.append(len(categories))
+        else:
+            self.created[row] = created
+            self.amount[row] = amount
+            self.declined[row] = declined
+            start = self._split_start[row]
+            for split in range(start, start + self._split_count[row]):
+                self.split_row[split] = DEAD_ROW
+            self._split_start[row] = len(self.split_row)
+            self._split_count[row] = len(categories)
+        for category, split_amount in categories.items():
+            self.split_row.append(row)
+            self.split_category.append(self._intern_category(category))
+            self.split_amount.append(split_amount)
+
+    def splits(self, row: int) -> dict[str, int]:
+        start = self._split_start[row]
+        return {
+            self.categories[self.split_category[split]]: self.split_amount[split]
+            for split in range(start, start + self._split_count[row])
+        }
+
+    def _index_splits(self) -> None:
+        self._split_start = array("l", [0] * len(self.ids))
+        self._split_count = array("l", [0] * len(self.ids))
+        for split, row in enumerate(self.split_row):
+            if row != DEAD_ROW:
+                if not self._split_count[row]:
+                    self._split_start[row] = split
+                self._split_count[row] += 1
+
+    def compact(self, keep: list[bool]) -> None:
+        """Drop the rows not marked to keep, and every dead split."""
+        renumber = array("l", [DEAD_ROW] * len(self.ids))
+        kept = 0
+        for row, keep_row in enumerate(keep):
+            if keep_row:
+                renumber[row] = kept
+                kept += 1
+        self.ids = [value for value, keep_row in zip(self.ids, keep) if keep_row]
+        self._row_index = {value: index for index, value in enumerate(self.ids)}
+        self.account = array("l", (value for value, keep_row in zip(self.account, keep) if keep_row))
+        self.created = array("d", (value for value, keep_row in zip(self.created, keep) if keep_row))
+        self.amount = array("q", (value for value, keep_row in zip(self.amount, keep) if keep_row))
+        self.declined = array("b", (value for value, keep_row in zip(self.declined, keep) if keep_row))
+        splits = [
+            (renumber[row], category, amount)
+            for row, category, amount in zip(self.split_row, self.split_category, self.split_amount)
+            if row != DEAD_ROW and renumber[row] != DEAD_ROW
+        ]
+        self.split_row = array("l", (row for row, _, _ in splits))
+        self.split_category = array("l", (category for _, category, _ in splits))
+        self.split_amount = array("q", (amount for _, _, amount in splits))
+        self._index_splits()
+
+
+class MonzoTransactionStore:
+    """Transactions in columnar form, with a sync cursor per account.
+
+    Only the fields needed for aggregation are kept. The cursor is the
+    creation time of the newest transaction seen for the account. Accounts
+    synced from a later start than their history needs also keep where
+    their stored history starts, until the older part has been backfilled.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialise the store."""
+        self._store = _TransactionStorage(
+            hass, TRANSACTION_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.transactions"
+        )
+        self._columns = TransactionColumns()
+        self._cursors: dict[str, float | None] = {}
+        self._backfill: dict[str, float] = {}
+
+    async def async_load(self) -> None:
+        """Load persisted transactions."""
+        data = await self._store.async_load()
+        if data is not None:
+            self._cursors = data["cursors"]
+            self._backfill = data.get("backfill", {})
+            self._columns = TransactionColumns.from_dict(data)
+
+    def cursor(self, account_id: str) -> datetime | None:
+        """Return the creation time of the newest stored transaction."""
+        cursor = self._cursors.get(account_id)
+        if cursor is None:
+            return None
+        return dt_util.utc_from_timestamp(cursor)
+
+    def sync_start(self, account_id: str, floor: datetime) -> datetime:
+        """Return where the next sync should start from.
+
+        Transactions are re-fetched for a short overlap before the cursor so
+        pending items that settle later are picked up again.
+        """
+        cursor = self.cursor(account_id)
+        if cursor is None:
+            return floor
+        return max(cursor - TRANSACTION_SYNC_OVERLAP, floor)
+
+    def backfill_until(self, account_id: str) -> datetime | None:
+        """Return where an account's stored history starts, if older is missing."""
+        until = self._backfill.get(account_id)
+        if until is None:
+            return None
+        return dt_util.utc_from_timestamp(until)
+
+    def set_backfill_until(self, account_id: str, until: datetime | None) -> None:
+        """Record where an account's stored history starts, or None once complete."""
+        if until is None:
+            self._backfill.pop(account_id, None)
+        else:
+            self._backfill[account_id] = until.timestamp()
+
+    def upsert(self, transaction: TransactionSummary) -> dict[str, Any] | None:
+        """Insert or replace a transaction, returning the previous record."""
+        previous = self.get(transaction.account_id, transaction.id)
+        created = dt_util.parse_datetime(transaction.created).timestamp()
+        self._columns.upsert(
+            transaction.account_id,
+            transaction.id,
+            created,
+            transaction.amount,
+            transaction.decline_reason is not None,
+            transaction.categories or {},
+        )
+        cursor = self._cursors.get(transaction.account_id)
+        if cursor is None or created > cursor:
+            self._cursors[transaction.account_id] = created
+        return previous
+
+    def get(self, account_id: str, transaction_id: str) -> dict[str, Any] | None:
+        """Return the stored record for a transaction."""
+        columns = self._columns
+        row = columns.row(transaction_id)
+        if row is None or columns.accounts[columns.account[row]] != account_id:
+            return None
+        return {
+            "created": columns.created[row],
+            "amount": columns.amount[row],
+            "declined": bool(columns.declined[row]),
+            "categories": columns.splits(row),
+        }
+
+    def prune(self, before: datetime) -> None:
+        """Drop transactions created before the given time."""
+        threshold = before.timestamp()
+        self._columns.compact([created >= threshold for created in self._columns.created])
+
+    def splits(self, account_ids: list[str]) -> Iterator[tuple[str, float, str, int]]:
+        """Yield the account, creation time, category and amount of each split.
+
+        Splits of declined transactions are skipped.
+        """
+        columns = self._columns
+        wanted = {
+            index for index, account_id in enumerate(columns.accounts) if account_id in account_ids
+        }
+        accounts, categories = columns.accounts, columns.categories
+        for row, category, amount in zip(columns.split_row, columns.split_category, columns.split_amount):
+            if row == DEAD_ROW or columns.declined[row]:
+                continue
+            account = columns.account[row]
+            if account in wanted:
+                yield accounts[account], columns.created[row], categories[category], amount
+
+    def async_schedule_save(self) -> None:
+        """Persist the store after a short delay."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Persist the store now."""
+        await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"cursors": self._cursors, "backfill": self._backfill, **self._columns.as_dict()}
@@ -0,0 +1,35 @@
+"""De-duplication of Monzo webhook deliveries."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+
+DEFAULT_MAX_SIZE = 512
+
+
+class WebhookDeduplicator:
+    """Bounded LRU of recently seen webhook deliveries.
+
+    Monzo retries deliveries it considers failed, so the same payload can
+    arrive more than once. A delivery is identified by its event type,
+    transaction id and a hash of the raw body, which lets a later
+    transaction.updated through while dropping exact repeats.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """Initialise the deduplicator."""
+        self._max_size = max_size
+        self._seen: OrderedDict[tuple[str, str, bytes], None] = OrderedDict()
+        self.duplicates = 0
+
+    def is_duplicate(self, event_type: str, transaction_id: str, body: bytes) -> bool:
+        """Record a delivery and return whether it was seen before."""
+        key = (event_type, transaction_id, hashlib.blake2b(body, digest_size=16).digest())
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            self.duplicates += 1
+            return True
+        self._seen[key] = None
+        if len(self._seen) > self._max_size:
+            self._seen.popitem(last=False)
+        return False
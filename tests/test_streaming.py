@@ -0,0 +1,62 @@
+"""Tests for splitting a JSON array out of a streamed body."""
+import json
+
+import pytest
+
+from custom_components.monzo.api.streaming import JsonArraySplitter
+
+BODY = json.dumps(
+    {
+        "meta": {"transactions": [{"decoy": True}]},
+        "note": "transactions",
+        "transactions": [
+            {"id": "tx_1", "description": 'say "hi" [to] {you}'},
+            {"id": "tx_2", "description": "back\\slash\\", "tags": [[1, 2], {}]},
+            {"id": "tx_3", "transactions": [{"id": "nested"}]},
+        ],
+        "after": [{"id": "ignored"}],
+    }
+).encode()
+
+
+def split(body: bytes, chunk_size: int) -> list[dict]:
+    splitter = JsonArraySplitter("transactions")
+    elements = []
+    for start in range(0, len(body), chunk_size):
+        elements.extend(splitter.feed(body[start:start + chunk_size]))
+    splitter.close()
+    return [json.loads(element) for element in elements]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 64, len(BODY)])
+def test_elements_survive_any_chunk_boundary(chunk_size):
+    assert split(BODY, chunk_size) == json.loads(BODY)["transactions"]
+
+
+def test_only_the_top_level_key_matches():
+    ids = [element["id"] for element in split(BODY, 5)]
+    assert ids == ["tx_1", "tx_2", "tx_3"]
+
+
+def test_empty_array():
+    assert split(b'{"transactions": []}', 1) == []
+
+
+def test_only_the_current_element_is_buffered():
+    splitter = JsonArraySplitter("transactions")
+    splitter.feed(b'{"transactions": [{"id": "tx_1"}, {"id": ')
+    assert len(splitter._buffer) == len(b'{"id": ')
+
+
+def test_truncated_body_raises_on_close():
+    splitter = JsonArraySplitter("transactions")
+    assert splitter.feed(b'{"transactions": [{"id": "tx_1"}, {"id"') == [b'{"id": "tx_1"}']
+    with pytest.raises(ValueError):
+        splitter.close()
+
+
+def test_missing_key_raises_on_close():
+    splitter = JsonArraySplitter("transactions")
+    assert splitter.feed(b'{"other": [{"id": "tx_1"}]}') == []
+    with pytest.raises(ValueError):
+        splitter.close()
@@ -0,0 +1,54 @@
+"""Tests for the columnar transaction layout."""
+from custom_components.monzo.transaction_store import DEAD_ROW, TransactionColumns
+
+
+def build() -> TransactionColumns:
+    columns = TransactionColumns()
+    columns.upsert("acc_1", "tx_1", 100.0, -500, False, {"groceries": -500})
+    columns.upsert("acc_2", "tx_2", 200.0, -700, False, {"eating_out": -300, "groceries": -400})
+    columns.upsert("acc_1", "tx_3", 300.0, 1000, False, {})
+    return columns
+
+
+def test_upsert_interns_accounts_and_categories():
+    columns = build()
+    assert columns.accounts == ["acc_1", "acc_2"]
+    assert columns.categories == ["groceries", "eating_out"]
+    assert columns.row("tx_2") == 1
+    assert columns.splits(1) == {"eating_out": -300, "groceries": -400}
+    assert columns.splits(2) == {}
+
+
+def test_replacing_a_row_kills_its_old_splits():
+    columns = build()
+    columns.upsert("acc_2", "tx_2", 200.0, -700, True, {"eating_out": -700})
+    assert columns.row("tx_2") == 1
+    assert bool(columns.declined[1])
+    assert columns.splits(1) == {"eating_out": -700}
+    assert columns.splits(0) == {"groceries": -500}
+    assert columns.split_row.tolist() == [0, DEAD_ROW, DEAD_ROW, 1]
+
+
+def test_compact_renumbers_rows_and_drops_dead_splits():
+    columns = build()
+    columns.upsert("acc_2", "tx_2", 200.0, -700, False, {"eating_out": -700})
+    columns.compact([False, True, True])
+    assert columns.ids == ["tx_2", "tx_3"]
+    assert columns.row("tx_1") is None
+    assert columns.row("tx_2") == 0
+    assert columns.created.tolist() == [200.0, 300.0]
+    assert columns.split_row.tolist() == [0]
+    assert columns.splits(0) == {"eating_out": -700}
+    assert columns.splits(1) == {}
+    # Rows upserted after compaction still find their splits.
+    columns.upsert("acc_1", "tx_3", 300.0, 1000, False, {"groceries": 1000})
+    assert columns.splits(1) == {"groceries": 1000}
+
+
+def test_round_trip_through_dict():
+    columns = build()
+    columns.upsert("acc_1", "tx_1", 100.0, -600, False, {"groceries": -600})
+    restored = TransactionColumns.from_dict(columns.as_dict())
+    assert restored.as_dict() == columns.as_dict()
+    for row in range(len(columns.ids)):
+        assert restored.splits(row) == columns.splits(row)